@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+ Checkpoints for directionalLoraIntf.py
+
+ The simulation state is a plain dictionary (see checkpointState() in the
+ simulator) that is pickled to disk. SimPy processes cannot be pickled, so
+ every node keeps the absolute time of its pending event and a resumed run
+ recreates the processes from that. Pending events are scheduled at absolute
+ times with timeoutAt(), so that a resumed run sees bit for bit the same
+ event times as an uninterrupted one.
+"""
+
+import os
+import pickle
+import numpy as np
+
+
+#
+# an event that fires exactly at time t
+# env.timeout(t - env.now) fires at env.now + (t - env.now), which can
+# differ from t in the last bit, so the delay is moved by one ulp then
+#
+def timeoutAt(env, t):
+    delay = max(0.0, t - env.now)
+    if env.now + delay < t:
+        delay = float(np.nextafter(delay, np.inf))
+    elif env.now + delay > t and delay > 0:
+        delay = float(np.nextafter(delay, 0))
+    return env.timeout(delay)
+
+
+#
+# write a checkpoint; the file is written under a temporary name and
+# renamed, so that a job killed while writing keeps the previous checkpoint
+#
+def save(fname, state):
+    tmp = "%s.tmp" % fname
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f, 2)
+    os.rename(tmp, fname)
+
+
+def load(fname):
+    with open(fname, 'rb') as f:
+        return pickle.load(f)
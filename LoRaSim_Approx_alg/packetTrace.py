@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+ Per packet trace for directionalLoraIntf.py
+
+ Every transmission gives one record per base station: node, bs, sf, freq,
+ bw, start and airtime (ms), the time the packet left the air at the BS
+ (end; a node sends for the airtime of its packet to BS 0), rssi at the BS,
+ outcome and the sequence number of the packet. The writer fills fixed size column buffers and writes every
+ full buffer as a chunk, one .npy file per column:
+
+     <dir>/<column>.<chunk>.npy
+
+ so the memory use does not depend on the length of the run. chunks()
+ memory maps the files of one chunk after the other; load() concatenates
+ whole columns for traces that fit in memory.
+
+ Records are written when a transmission ends, i.e. in order of their end
+ time.
+"""
+
+import os
+import glob
+import numpy as np
+
+# columns of a trace and their types
+COLUMNS = (('node', np.int32), ('bs', np.int16), ('sf', np.int8), ('freq', np.int32),
+           ('bw', np.int16), ('start', np.float64), ('airtime', np.float64),
+           ('end', np.float64), ('rssi', np.float64), ('outcome', np.int8), ('seq', np.int64))
+
+# outcomes
+RECEIVED = 0
+COLLIDED = 1
+LOST = 2
+
+# records per chunk
+CHUNK = 1 << 20
+
+
+class TraceWriter():
+    def __init__(self, dirname, chunk=CHUNK):
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        self.dirname = dirname
+        self.chunk = chunk
+        self.buffers = [np.empty(chunk, dtype=t) for name, t in COLUMNS]
+        self.n = 0
+        self.nrChunks = 0
+
+    def add(self, node, bs, sf, freq, bw, start, airtime, end, rssi, outcome, seq):
+        i = self.n
+        for buf, value in zip(self.buffers, (node, bs, sf, freq, bw, start, airtime, end, rssi, outcome, seq)):
+            buf[i] = value
+        self.n = i + 1
+        if self.n == self.chunk:
+            self.flush()
+
+    #
+    # write the buffered records as a chunk (possibly shorter than CHUNK)
+    # and return the number of chunks written so far
+    #
+    def flush(self):
+        if self.n:
+            for (name, t), buf in zip(COLUMNS, self.buffers):
+                fname = chunkName(self.dirname, name, self.nrChunks)
+                np.save(fname + '.tmp', buf[:self.n])
+                os.rename(fname + '.tmp.npy', fname)
+            self.nrChunks = self.nrChunks + 1
+            self.n = 0
+        return self.nrChunks
+
+    #
+    # continue a trace after its first nrChunks chunks, e.g. when a run is
+    # resumed from a checkpoint; later chunks are removed
+    #
+    def truncate(self, nrChunks):
+        self.n = 0
+        self.nrChunks = nrChunks
+        for k in chunkNumbers(self.dirname):
+            if k >= nrChunks:
+                for name, t in COLUMNS:
+                    os.remove(chunkName(self.dirname, name, k))
+
+    def close(self):
+        self.flush()
+
+
+def chunkName(dirname, column, k):
+    return os.path.join(dirname, "%s.%06d.npy" % (column, k))
+
+
+def chunkNumbers(dirname):
+    files = glob.glob(os.path.join(dirname, "%s.??????.npy" % COLUMNS[0][0]))
+    return sorted([int(os.path.basename(f).split('.')[1]) for f in files])
+
+
+#
+# every chunk of a trace as a dictionary of memory mapped columns
+#
+def chunks(dirname, columns=None):
+    names = columns or [name for name, t in COLUMNS]
+    for k in chunkNumbers(dirname):
+        yield dict([(name, np.load(chunkName(dirname, name, k), mmap_mode='r')) for name in names])
+
+
+#
+# whole columns of a trace
+#
+def load(dirname, columns=None):
+    names = columns or [name for name, t in COLUMNS]
+    parts = dict([(name, []) for name in names])
+    for c in chunks(dirname, names):
+        for name in names:
+            parts[name].append(c[name])
+    return dict([(name, np.concatenate(parts[name]) if parts[name] else
+                  np.zeros(0, dtype=dict(COLUMNS)[name])) for name in names])
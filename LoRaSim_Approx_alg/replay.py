@@ -0,0 +1,262 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+"""
+ SYNOPSIS:
+   ./replay.py <trace dir> [options]
+ DESCRIPTION:
+    Resolves the collisions of a trace written with --trace again, under a
+    different collision model, without simulating the traffic again. The
+    rules are those of checkcollision() in directionalLoraIntf.py: a packet
+    that reaches a BS collides with every packet in the air at that BS on
+    the same SF and an overlapping frequency; with the full collision check
+    it only loses if its critical preamble overlaps (timingCollision) and it
+    is not stronger by the power threshold (powerCollision).
+
+    The trace is read chunk by chunk. The overlapping pairs of packets are
+    found with one vectorised pass over the packets sorted by start time at
+    every BS, and the collided flags are set for all pairs at once. Packets
+    are kept until no later packet can overlap with them, so memory use
+    depends on the chunk size, not on the length of the trace.
+
+    Packets that were still in the air at the end of the run are not in the
+    trace, so collisions they caused are not seen in the replay.
+ OPTIONS
+    --collision <0|1>
+        0 for the simplified check, 1 for the full check (default).
+    --power <dB>
+        capture threshold of powerCollision (default 6).
+    --critical <symbols>
+        number of preamble symbols a packet can lose (default 3, i.e. 8
+        preamble symbols of which the last 5 must be clear).
+    --networks <n>
+        number of networks as in the simulation (default 1); with more
+        networks a BS only counts packets of its own nodes.
+    --out <dir>
+        write the trace with the new outcomes to dir.
+    --kernel <auto|numba|numpy|python>
+        how the pairs are resolved: the Numba compiled loop of kernels.py,
+        the vectorised NumPy version or the loop uncompiled (slow, for
+        checking). auto uses Numba when it is installed and NumPy otherwise;
+        all give the same results.
+ OUTPUT
+    The number of collisions and the DER per BS and derALL2, computed as
+    in the simulator, and how many records changed their outcome.
+"""
+
+import sys
+import getopt
+import numpy as np
+import packetTrace
+import kernels
+
+# columns the replay needs
+COLUMNS = ('node', 'bs', 'sf', 'freq', 'bw', 'start', 'airtime', 'end', 'rssi', 'outcome', 'seq')
+
+
+#
+# the collision model
+#
+class Model():
+    def __init__(self, fullCollision=True, powerThreshold=6.0, critical=3):
+        self.fullCollision = fullCollision
+        self.powerThreshold = powerThreshold
+        self.critical = critical
+
+
+#
+# all pairs (i, j) of packets at the same BS where j starts while i is in
+# the air; order sorts the packets by BS and start time and maxAirtime
+# (the longest time in the air) bounds how far back i can be
+#
+def overlaps(bs, start, end, order, maxAirtime):
+    s = start[order]
+    b = bs[order]
+    # key that is increasing over the sorted packets, the BS in the high part
+    key = b*(s.max() - s.min() + 2*maxAirtime + 1) + (s - s.min())
+    first = np.searchsorted(key, key - maxAirtime, side='left')
+    counts = np.arange(len(s)) - first
+    total = counts.sum()
+    if total == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    j = np.repeat(np.arange(len(s)), counts)
+    i = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(first, counts)
+    i, j = order[i], order[j]
+    keep = end[i] > start[j]
+    return i[keep], j[keep]
+
+
+#
+# frequencyCollision() and sfCollision() of the simulator, p1 = j, p2 = i
+#
+def interfere(r, i, j):
+    df = np.abs(r['freq'][j].astype(np.int64) - r['freq'][i])
+    freq = (((df <= 120) & ((r['bw'][j] == 500) | (r['freq'][i] == 500))) |
+            ((df <= 60) & ((r['bw'][j] == 250) | (r['freq'][i] == 250))) |
+            (df <= 30))
+    return freq & (r['sf'][j] == r['sf'][i])
+
+
+#
+# set the collided flags for the pairs (i, j), j arriving while i is in the
+# air, and the counted flag of every j that collides on arrival
+#
+def resolve(r, i, j, model, collided, counted):
+    lost = r['outcome'] == packetTrace.LOST
+    # lost packets don't collide
+    keep = ~lost[j] & interfere(r, i, j)
+    i, j = i[keep], j[keep]
+    if not model.fullCollision:
+        collided[i] = True
+        collided[j] = True
+        counted[j] = True
+        return
+    # timingCollision(): i ends in the critical section of j
+    tpreamb = 2.0**r['sf'][j]/r['bw'][j]*model.critical
+    keep = r['start'][j] + tpreamb < r['start'][i] + r['airtime'][i]
+    i, j = i[keep], j[keep]
+    # powerCollision()
+    d = r['rssi'][j] - r['rssi'][i]
+    both = np.abs(d) < model.powerThreshold
+    jLoses = both | (d < model.powerThreshold)
+    iLoses = both | ~jLoses
+    collided[j[jLoses]] = True
+    collided[i[iLoses]] = True
+    counted[j[jLoses]] = True
+
+
+#
+# replay a trace; yields every record once its outcome can no longer
+# change, as a dictionary of columns with the new outcome, together with
+# the number of collisions counted for those records
+#
+def replay(dirname, model, kernel='auto'):
+    if kernel == 'auto':
+        kernel = 'numba' if kernels.sweep else 'numpy'
+    if kernel == 'numba' and not kernels.sweep:
+        raise ValueError("Numba is not installed")
+    maxAirtime = 0.0
+    for c in packetTrace.chunks(dirname, ['start', 'end']):
+        if len(c['start']):
+            maxAirtime = max(maxAirtime, float((c['end'] - c['start']).max()))
+
+    carry = None
+    for c in packetTrace.chunks(dirname, list(COLUMNS)):
+        cur = dict([(name, np.array(c[name])) for name in COLUMNS])
+        cur['collided'] = np.zeros(len(cur['seq']), dtype=bool)
+        cur['counted'] = np.zeros(len(cur['seq']), dtype=bool)
+        if carry is None:
+            r = cur
+            nrCarry = 0
+        else:
+            r = dict([(name, np.concatenate((carry[name], cur[name]))) for name in cur])
+            nrCarry = len(carry['seq'])
+        if len(r['seq']) == 0:
+            continue
+        end = r['end']
+        order = np.lexsort((r['seq'], r['start'], r['bs']))
+        if kernel == 'numpy':
+            i, j = overlaps(r['bs'], r['start'], end, order, maxAirtime)
+            # pairs among carried records were resolved before
+            new = (i >= nrCarry) | (j >= nrCarry)
+            resolve(r, i[new], j[new], model, r['collided'], r['counted'])
+        else:
+            sweep = kernels.sweep if kernel == 'numba' else kernels.sweepPython
+            sweep(r['bs'], r['start'], end, r['airtime'], r['sf'], r['freq'], r['bw'], r['rssi'],
+                  r['outcome'] == packetTrace.LOST, order, maxAirtime, model.fullCollision,
+                  float(model.powerThreshold), model.critical, nrCarry, r['collided'], r['counted'])
+
+        # records are in order of their end, later records start after
+        # the last end so far minus the longest airtime
+        final = end <= end.max() - maxAirtime
+        yield finish(r, final)
+        carry = dict([(name, r[name][~final]) for name in r])
+    if carry is not None and len(carry['seq']):
+        yield finish(carry, np.ones(len(carry['seq']), dtype=bool))
+
+
+def finish(r, final):
+    out = dict([(name, r[name][final]) for name in COLUMNS])
+    out['recorded'] = out['outcome']
+    outcome = np.where(r['collided'][final], packetTrace.COLLIDED, packetTrace.RECEIVED)
+    out['outcome'] = np.where(out['recorded'] == packetTrace.LOST, packetTrace.LOST, outcome).astype(np.int8)
+    out['counted'] = r['counted'][final]
+    return out
+
+
+#
+# "main" program
+#
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print ("usage: ./replay.py <trace dir> [--collision 0|1] [--power dB] [--critical symbols] [--networks n] [--out dir] [--kernel k]")
+        exit(-1)
+    traceDir = sys.argv[1]
+    model = Model()
+    nrNetworks = 1
+    outDir = None
+    kernel = 'auto'
+    try:
+        opts, args = getopt.getopt(sys.argv[2:], '', ['collision=', 'power=', 'critical=', 'networks=', 'out=', 'kernel='])
+    except getopt.GetoptError as e:
+        print (e)
+        exit(-1)
+    for opt, val in opts:
+        if opt == '--collision':
+            model.fullCollision = bool(int(val))
+        elif opt == '--power':
+            model.powerThreshold = float(val)
+        elif opt == '--critical':
+            model.critical = int(val)
+        elif opt == '--networks':
+            nrNetworks = int(val)
+        elif opt == '--out':
+            outDir = val
+        elif opt == '--kernel':
+            kernel = val
+    if kernel == 'numba' and not kernels.sweep:
+        print ("--kernel numba needs Numba, use --kernel numpy")
+        exit(-1)
+
+    writer = packetTrace.TraceWriter(outDir) if outDir else None
+    nrCollisions = 0
+    changed = 0
+    records = 0
+    sentSeq = 0
+    receivedSeq = 0
+    received = {}
+    sent = {}
+    nrBS = 0
+    for r in replay(traceDir, model, kernel):
+        if len(r['seq']) == 0:
+            continue
+        nrBS = max(nrBS, int(r['bs'].max()) + 1)
+        records = records + len(r['seq'])
+        changed = changed + int((r['outcome'] != r['recorded']).sum())
+        nrCollisions = nrCollisions + int(r['counted'].sum())
+        # node i*nrBS+j belongs to BS j; all records of a packet are final
+        # at the same time, as they end at the same time
+        ok = r['outcome'] == packetTrace.RECEIVED
+        if nrNetworks > 1:
+            ok = ok & (r['node'] % nrBS == r['bs'])
+        for bs in np.unique(r['bs']):
+            received[bs] = received.get(bs, 0) + int((ok & (r['bs'] == bs)).sum())
+        seq, first = np.unique(r['seq'], return_index=True)
+        sentSeq = sentSeq + len(seq)
+        home = r['node'][first] % nrBS
+        for bs in np.unique(home):
+            sent[bs] = sent.get(bs, 0) + int((home == bs).sum())
+        receivedSeq = receivedSeq + len(np.unique(r['seq'][r['outcome'] == packetTrace.RECEIVED]))
+        if writer:
+            for n in range(len(r['seq'])):
+                writer.add(*[r[name][n] for name in COLUMNS])
+    if writer:
+        writer.close()
+
+    print ("full collision: %d, power threshold: %g dB, critical preamble symbols: %d"
+           % (model.fullCollision, model.powerThreshold, model.critical))
+    print ("records: %d, outcome changed: %d" % (records, changed))
+    print ("sent packets: %d" % sentSeq)
+    print ("nr collisions: %d" % nrCollisions)
+    for bs in range(0, nrBS):
+        print ("DER BS[%d]: %f" % (bs, received.get(bs, 0)/float(sent.get(bs, 0) or 1)))
+    print ("derALL2: %f" % ((receivedSeq - nrCollisions)/float(sentSeq or 1)))
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+ Analytic DER estimate for directionalLoraIntf.py
+
+ The pure ALOHA model that parse-solution-log.py applies to MILP solutions
+ (success probability exp(-2 N_cf,sf T_SF lambda) per channel and spreading
+ factor), extended with what the simulator adds on top of it:
+   - a packet below the sensitivity of a base station is lost there (but
+     still interferes with other packets, as in checkcollision()),
+   - every base station receives on its own, a packet is received when at
+     least one base station receives it,
+   - with the full collision check a packet survives interferers that are
+     at least 6 dB weaker (capture), as in powerCollision().
+ Timing collisions (late arrival of a stronger packet) are not modelled.
+
+ The packet settings (SF, channel, airtime, RSSI) are taken from the nodes
+ the simulator created, so every strategy is estimated with its own
+ assignment. For a sweep the estimate for n nodes per BS uses the first
+ n*nrBS nodes given; experiment 4 of this strategy assigns SF and channel by
+ node id relative to the number of nodes, so the simulator creates the
+ nodes of every count anew (sweep() is only right when a run with n nodes
+ places the first n nodes of a larger run).
+"""
+
+import numpy as np
+
+# a packet survives an interferer that is this much weaker (dB)
+POWER_THRESHOLD = 6
+
+
+#
+# the settings of all packets as (node, BS) arrays
+#
+def settings(nodes, nrBS):
+    nrNodes = len(nodes)
+    s = {}
+    for name in ('sf', 'freq', 'airtime', 'rssi'):
+        s[name] = np.zeros((nrNodes, nrBS))
+    s['reach'] = np.zeros((nrNodes, nrBS), dtype=bool)
+    s['home'] = np.zeros(nrNodes, dtype=int)
+    s['period'] = np.zeros(nrNodes)
+    for i, n in enumerate(nodes):
+        s['home'][i] = n.bs.id
+        s['period'][i] = n.period
+        for bs in range(0, nrBS):
+            p = n.packet[bs]
+            s['sf'][i, bs] = p.sf
+            s['freq'][i, bs] = p.freq
+            s['airtime'][i, bs] = p.rectime
+            s['rssi'][i, bs] = p.rssi
+            s['reach'][i, bs] = not getattr(p, 'lost', False)
+    return s
+
+
+#
+# expected number of interfering packets for every packet of a group of
+# packets on the same channel and SF at one BS: vulnerable counts the
+# packets that overlap with it, atStart those already in the air when it
+# starts (what the simulator counts as a collision)
+#
+def groupLoad(rate, airtime, rssi, capture):
+    if capture:
+        order = np.argsort(rssi)
+        rate, airtime, rssi = rate[order], airtime[order], rssi[order]
+    # sums over the interferers, from the strongest down
+    rt = np.cumsum((rate*airtime)[::-1])[::-1]
+    r = np.cumsum(rate[::-1])[::-1]
+    if capture:
+        # the interferers of a packet are those less than POWER_THRESHOLD
+        # weaker than itself
+        first = np.searchsorted(rssi, rssi - POWER_THRESHOLD, side='right')
+    else:
+        first = np.zeros(len(rate), dtype=int)
+    sumRT = np.append(rt, 0)[first] - rate*airtime
+    sumR = np.append(r, 0)[first] - rate
+    vulnerable = sumRT + airtime*sumR
+    atStart = sumRT
+    if capture:
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        vulnerable, atStart = vulnerable[inverse], atStart[inverse]
+    return vulnerable, atStart
+
+
+#
+# DER estimate for the first n nodes per BS
+# derALL is the share of packets received by at least one BS, der the DER
+# of every BS as computed by the simulator, collisionRate the expected
+# number of collisions counted per packet sent and derALL2 the simulator's
+# derALL2 (received minus collisions over sent)
+#
+def estimate(s, n, nrBS, fullCollision, nrNetworks):
+    m = n*nrBS
+    sf, freq = s['sf'][:m], s['freq'][:m]
+    airtime, rssi, reach = s['airtime'][:m], s['rssi'][:m], s['reach'][:m]
+    home = s['home'][:m]
+    # a node waits period on average, then sends for the airtime of its
+    # first packet
+    rate = 1.0/(s['period'][:m] + airtime[:, 0])
+
+    success = np.zeros((m, nrBS))
+    collided = np.zeros((m, nrBS))
+    for bs in range(0, nrBS):
+        keys = np.column_stack((freq[:, bs], sf[:, bs]))
+        groups = np.unique(keys, axis=0, return_inverse=True)[1].ravel()
+        for g in range(groups.max() + 1):
+            members = np.flatnonzero(groups == g)
+            vulnerable, atStart = groupLoad(rate[members], airtime[members, bs],
+                                            rssi[members, bs], fullCollision)
+            success[members, bs] = np.exp(-vulnerable)
+            collided[members, bs] = 1 - np.exp(-atStart)
+    # lost packets are neither received nor counted as collided
+    success[~reach] = 0
+    collided[~reach] = 0
+
+    sent = rate.sum()
+    derALL = (rate*(1 - np.prod(1 - success, axis=1))).sum()/sent
+    collisionRate = (rate*collided.sum(axis=1)).sum()/sent
+    der = np.zeros(nrBS)
+    for bs in range(0, nrBS):
+        counted = success[:, bs] if nrNetworks == 1 else success[:, bs]*(home == bs)
+        der[bs] = (rate*counted).sum()/rate[home == bs].sum()
+    return {'nodes': n, 'rate': sent, 'derALL': derALL, 'derALL2': derALL - collisionRate,
+            'collisionRate': collisionRate, 'der': der}
+
+
+#
+# estimates for every node count of a sweep
+#
+def sweep(s, counts, nrBS, fullCollision, nrNetworks):
+    return [estimate(s, n, nrBS, fullCollision, nrNetworks) for n in counts]
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+ Packet arrival streams for directionalLoraIntf.py
+
+ Instead of one random.expovariate() call per packet, every node draws the
+ times between its packets in blocks with NumPy and takes them from its
+ buffer one by one. Block k of node n comes from a generator seeded with
+ (seed, run, n, k), so that
+   - the traffic of a node does not depend on what other nodes do, and
+     runs that only differ in e.g. the collision model or the strategy see
+     the same arrivals,
+   - a checkpoint only needs the block and position of every node.
+ A time window of a run (see --window in the simulator) adds its number to
+ the seed, so that every window has its own independent streams.
+
+ poisson: exponential times with mean period, as random.expovariate().
+ periodic: period plus a uniform jitter in [-jitter, jitter], starting at
+           a random offset in [0, period].
+"""
+
+import numpy as np
+
+# times drawn at a time per node
+BLOCK = 256
+
+KINDS = ('poisson', 'periodic')
+
+
+class Arrivals():
+    def __init__(self, kind, period, nrNodes, seed=None, run=0, jitter=0.0, block=BLOCK, window=None):
+        if kind not in KINDS:
+            raise ValueError("unknown arrival process '%s', use one of %s" % (kind, ', '.join(KINDS)))
+        self.kind = kind
+        self.period = float(period)
+        self.jitter = float(jitter)
+        self.block = block
+        if seed is None:
+            seed = np.random.randint(2**31)
+        self.seed = seed
+        self.run = run
+        self.window = window
+        self.buffers = [None]*nrNodes
+        self.pos = [0]*nrNodes
+        self.blocks = [0]*nrNodes
+
+    def draw(self, node, k):
+        if self.window is None:
+            rng = np.random.RandomState([self.seed, self.run, node, k])
+        else:
+            rng = np.random.RandomState([self.seed, self.run, node, k, self.window])
+        if self.kind == 'poisson':
+            times = rng.exponential(self.period, self.block)
+        else:
+            times = self.period + rng.uniform(-self.jitter, self.jitter, self.block)
+            if k == 0:
+                times[0] = rng.uniform(0, self.period)
+            times = np.maximum(times, 0.0)
+        return times.tolist()
+
+    #
+    # time until the next packet of node
+    #
+    def next(self, node):
+        p = self.pos[node]
+        buf = self.buffers[node]
+        if buf is None or p == len(buf):
+            buf = self.buffers[node] = self.draw(node, self.blocks[node])
+            self.blocks[node] = self.blocks[node] + 1
+            p = 0
+        self.pos[node] = p + 1
+        return buf[p]
+
+    #
+    # the state for a checkpoint: block and position of every node; the
+    # buffers are drawn again when the state is restored
+    #
+    def getstate(self):
+        return (self.seed, list(self.blocks), list(self.pos))
+
+    def setstate(self, state):
+        self.seed, blocks, pos = state
+        self.blocks = list(blocks)
+        self.pos = list(pos)
+        for node in range(len(self.blocks)):
+            if self.blocks[node] > 0:
+                self.buffers[node] = self.draw(node, self.blocks[node] - 1)
+            else:
+                self.buffers[node] = None
@@ -51,6 +51,105 @@
         number of LoRa networks
     basedist
         X-distance between two base stations
+ OPTIONS
+    --layout <legacy|grid|hex|random>
+        how the base stations are placed. legacy (default) keeps the original
+        positions for 1-6, 8, 24 and 96 base stations and uses grid otherwise.
+    --bsfile <file>
+        read the base station positions from a file with one "x,y" per line;
+        the number of base stations is taken from the file.
+    --seed <n>
+        seed for the random number generators
+    --topocache <dir>
+        together with --seed, store the generated topology (node and base
+        station positions, distances and RSSI) in this directory and reuse it
+        in later runs with the same nodes, base stations, basedist and seed.
+    --shm
+        like --topocache, but keep the topology in shared memory (/dev/shm),
+        so that parallel runs map the same copy (see replications.py).
+        The file stays there, using memory, until it is deleted or the
+        machine reboots: replications.py deletes it when all runs are done,
+        for single runs delete it yourself or use --shm-clean.
+    --shm-clean
+        with --shm, delete the topology when the run ends if the run
+        created it (a topology that was loaded is left alone).
+    --topoonly
+        only generate (or load) the topology, then stop.
+    --channelsonly
+        only print the number of channels (BS, frequency, SF) the nodes use,
+        then stop; parallel.py runs no more --channels parts than that.
+    --run <k>
+        replication number: runs with the same --seed and a different --run
+        share the topology but use independent random streams.
+    --result <file>
+        also save the counters of the run into this .npz file.
+    --checkpoint <file>
+        save the complete simulation state into this file every --ckpt-every
+        milliseconds of simulated time (default: simtime/100).
+    --resume
+        continue from the --checkpoint file, if it exists. The run must use the
+        same arguments and --seed; the result is the same as that of a run
+        that was never interrupted.
+    --ci <halfwidth>
+        stop as soon as the 95% confidence interval of derALL2 and of the DER
+        of every BS, estimated with batch means, is at most +-halfwidth (after
+        at least 10 batches). simtime is then only an upper limit.
+    --batch <ms>
+        length of a batch in simulated ms (default: 10 * avgsend).
+    --budget <s>
+        with --ci, also stop after this many seconds of wall-clock time.
+    --warmup
+        detect the warm-up period at the start of the run (MSER truncation of
+        the batch occupancy of every gateway) and report the DER and the
+        collisions of the steady state only. With --ci the interval is also
+        computed without the warm-up batches.
+    --analytic
+        do not simulate, estimate the DER with the analytic model of
+        analytic.py (pure ALOHA per channel and SF with the sensitivity,
+        capture and all base stations of the simulator) for the nodes and
+        settings the simulation would use.
+    --sweep <n1,n2,...>
+        with --analytic, estimate for each of these numbers of nodes per BS
+        (nodes is ignored). The results are appended to
+        expXd99BSYAnalytic.dat.
+    --progress <s>
+        print the progress of the run every s seconds of wall-clock time:
+        simulated time, events per second, packets sent, packets in the air
+        at every BS and the estimated time to completion.
+    --progress-json <file>
+        append the same reports as JSON lines to file ('-' for stdout),
+        every --progress seconds (default: 10).
+    --trace <dir>
+        write a record of every transmission at every BS (node, bs, sf, freq,
+        bw, start, airtime, end, rssi, outcome, seq) to dir, in chunks of .npy
+        column files (see packetTrace.py).
+    --sinr <dB>
+        decide collisions on the cumulative interference instead of one
+        packet at a time: a packet is received when it is at least dB above
+        the mean power of all other packets on its frequency and SF at the BS
+        during its airtime (see interference.py).
+    --arrivals <poisson|periodic>
+        draw the times between the packets of every node in blocks with
+        NumPy (see arrivals.py) instead of one random.expovariate() call per
+        packet: exponential with mean avgsend, or avgsend with a uniform
+        jitter. The traffic of a node then only depends on the seed, the run
+        and its id.
+    --jitter <ms>
+        jitter of --arrivals periodic (default: 0).
+    --channels <k>/<K>
+        simulate only part k of K of the channels (BS, frequency, SF); packets
+        on different channels never collide, so K such runs together give the
+        result of one run. Needs --arrivals, see parallel.py.
+    --region <k>/<K>
+        simulate only the base stations of region k of K (the base stations
+        cut into K groups by position) and the nodes that belong to them or
+        that reach one of them (the halo). Needs --arrivals, see parallel.py.
+    --window <k>/<K>
+        count only the packets that start in time window k of K of simtime.
+        The window is simulated from one longest airtime before it until one
+        longest airtime after it, with arrival streams of its own, so K such
+        runs together give a run of simtime. Needs --arrivals, see
+        parallel.py.
  OUTPUT
     The result of every simulation run will be appended to a file named expX.dat,
     whereby X is the experiment number. The file contains a space separated table
@@ -65,7 +164,20 @@ import math
 import sys
 import matplotlib.pyplot as plt
 import os
+import time
+import getopt
+import atexit
 from matplotlib.patches import Rectangle
+import bsLayout
+import topology
+import checkpoint
+import stats
+import analytic
+import progress
+import packetTrace
+import interference
+import arrivals
+import partition
 
 # turn on/off graphics
 graphics = 0
@@ -73,6 +185,69 @@ graphics = 0
 # do the full collision check
 full_collision = True
 
+# base station layout (see bsLayout.py) and optional file with positions
+layout = 'legacy'
+bsFile = None
+
+# seed for the random number generators, None for a random seed
+seed = None
+
+# directory for cached topologies, None to always generate a new one
+topoDir = None
+topoOnly = False
+channelsOnly = False
+shmClean = False
+
+# replication number and file for the counters of this run
+run = 0
+resultFile = None
+
+# checkpoint file, interval between checkpoints (simulated ms) and resume flag
+ckptFile = None
+ckptEvery = None
+resume = False
+
+# target DER half-width, batch length (simulated ms) and wall-clock budget (s)
+ciTarget = None
+batchLen = None
+budget = None
+
+# drop the warm-up period from the results
+warmup = False
+
+# estimate the DER analytically instead of simulating, for these node counts
+analyticOnly = False
+sweep = None
+
+# wall-clock seconds between progress reports and file for JSON reports
+progressEvery = None
+progressJson = None
+
+# directory for the per packet trace
+traceDir = None
+tracer = None
+
+# SIR threshold (dB) of the cumulative interference model and its state
+sinr = None
+channels = interference.Interference()
+
+# arrival process drawn in blocks (None: random.expovariate per packet)
+arrivalKind = None
+jitter = 0.0
+arrivalStreams = None
+
+# part of the channels to simulate (k, K) and the transmissions received,
+# as node id * 2**32 + number of the transmission of the node
+channelPart = None
+recIds = []
+
+# region of the base stations to simulate (k, K)
+regionPart = None
+
+# time window to simulate (k, K), see counted()
+windowPart = None
+windowStart = 0
+
 CF1 = 868100000
 CF2 = 868300000
 CF3 = 868500000
@@ -225,119 +400,12 @@ def airtime(sf,cr,pl,bw):
 class myBS():
     def __init__(self, id):
         self.id = id
-        self.x = 0
-        self.y = 0
-
-        # This is a hack for now
-        global nrBS
-        global maxDist
-        global maxX
-        global maxY
-        global baseDist
-
-        if (nrBS == 1 and self.id == 0):
-            self.x = maxDist
-            self.y = maxY
-
-        if (nrBS == 2 and self.id == 0):
-            self.x = maxDist
-            self.y = maxY
-
-        if (nrBS == 2 and self.id == 1):
-            self.x = maxDist + baseDist
-            self.y = maxY
-
-        if (nrBS == 3 and self.id == 0):
-            self.x = maxDist + baseDist
-            self.y = maxY
-
-        if (nrBS == 3 and self.id == 1):
-            self.x = maxDist 
-            self.y = maxY
-
-        if (nrBS == 3 and self.id == 2): 
-            self.x = maxDist + 2*baseDist
-            self.y = maxY
-
-        if (nrBS == 4 and self.id == 0): 
-            self.x = maxDist + baseDist
-            self.y = maxY 
-
-        if (nrBS == 4 and self.id == 1):
-            self.x = maxDist 
-            self.y = maxY
 
-        if (nrBS == 4 and self.id == 2): 
-            self.x = maxDist + 2*baseDist
-            self.y = maxY
+        # positions of all base stations are computed at once, see bsLayout.py
+        global bsPos
+        self.x = float(bsPos[self.id, 0])
+        self.y = float(bsPos[self.id, 1])
 
-        if (nrBS == 4 and self.id == 3): 
-            self.x = maxDist + baseDist
-            self.y = maxY + baseDist 
-
-        if (nrBS == 5 and self.id == 0): 
-            self.x = maxDist + baseDist
-            self.y = maxY + baseDist 
-
-        if (nrBS == 5 and self.id == 1): 
-            self.x = maxDist 
-            self.y = maxY + baseDist 
-
-        if (nrBS == 5 and self.id == 2): 
-            self.x = maxDist + 2*baseDist
-            self.y = maxY + baseDist 
-
-        if (nrBS == 5 and self.id == 3): 
-            self.x = maxDist + baseDist
-            self.y = maxY 
-
-        if (nrBS == 5 and self.id == 4): 
-            self.x = maxDist + baseDist
-            self.y = maxY + 2*baseDist 
-
-
-        if (nrBS == 6): 
-            if (self.id < 3):
-                self.x = (self.id+1)*maxX/4.0
-                self.y = maxY/3.0
-            else:
-                self.x = (self.id+1-3)*maxX/4.0
-                self.y = 2*maxY/3.0
-
-        if (nrBS == 8): 
-            if (self.id < 4):
-                self.x = (self.id+1)*maxX/5.0
-                self.y = maxY/3.0
-            else:
-                self.x = (self.id+1-4)*maxX/5.0
-                self.y = 2*maxY/3.0
-
-        if (nrBS == 24): 
-            if (self.id < 8):
-                self.x = (self.id+1)*maxX/9.0
-                self.y = maxY/4.0
-            elif (self.id < 16):
-                self.x = (self.id+1-8)*maxX/9.0
-                self.y = 2*maxY/4.0
-            else:
-                self.x = (self.id+1-16)*maxX/9.0
-                self.y = 3*maxY/4.0
-
-        if (nrBS == 96): 
-            if (self.id < 24):
-                self.x = (self.id+1)*maxX/25.0
-                self.y = maxY/5.0
-            elif (self.id < 48):
-                self.x = (self.id+1-24)*maxX/25.0
-                self.y = 2*maxY/5.0
-            elif (self.id < 72):
-                self.x = (self.id+1-48)*maxX/25.0
-                self.y = 3*maxY/5.0
-            else:
-                self.x = (self.id+1-72)*maxX/25.0
-                self.y = 4*maxY/5.0
-
-        
         print "BSx:", self.x, "BSy:", self.y
 
         global graphics
@@ -371,56 +439,30 @@ class myNode():
         self.id = id
         self.period = period
 
-        self.x = 0
-        self.y = 0
         self.packet = []
         self.dist = []
-        # this is very complex prodecure for placing nodes
-        # and ensure minimum distance between each pair of nodes
-        found = 0
-        rounds = 0
-        global nodes
-        while (found == 0 and rounds < 100):
-            global maxX
-            global maxY
-            a = random.random()
-            b = random.random()
-            if b<a:
-                a,b = b,a
-            posx = b*maxDist*math.cos(2*math.pi*a/b)+self.bs.x
-            posy = b*maxDist*math.sin(2*math.pi*a/b)+self.bs.y
-            if len(nodes) > 0:
-                for index, n in enumerate(nodes):
-                    dist = np.sqrt(((abs(n.x-posx))**2)+((abs(n.y-posy))**2)) 
-                    # we set this so nodes can be placed everywhere
-                    # otherwise there is a risk that little nodes are placed
-                    # between the base stations where it would be more crowded
-                    if dist >= 0: 
-                        found = 1
-                        self.x = posx
-                        self.y = posy
-                    else:
-                        rounds = rounds + 1
-                        if rounds == 100:
-                            print "could not place new node, giving up"
-                            exit(-2) 
-            else:
-                print "first node"
-                self.x = posx
-                self.y = posy
-                found = 1
 
+        # position and distance to every BS come from the topology
+        global topo
+        self.x = float(topo['nodes'][self.id, 0])
+        self.y = float(topo['nodes'][self.id, 1])
 
         # create "virtual" packet for each BS
         global nrBS
         for i in range(0,nrBS):
-            d = np.sqrt((self.x-bs[i].x)*(self.x-bs[i].x)+(self.y-bs[i].y)*(self.y-bs[i].y)) 
-            self.dist.append(d)
+            self.dist.append(float(topo['dist'][self.id, i]))
             self.packet.append(myPacket(self.id, packetlen, self.dist[i], i))
         #print('node %d' %id, "x", self.x, "y", self.y, "dist: ", self.dist, "my BS:", self.bs.id)
 
         self.sent = 0
 
+        # the BS whose packets are simulated, see --channels
+        self.bsList = list(range(0, nrBS))
+
+        # the transmission state; wakeup is the time of the next event
+        self.inAir = False
+        self.wakeup = None
+
         # graphics for node
         global graphics
         if (graphics == 1):
@@ -441,46 +483,12 @@ class myNode():
 #   update RSSI depending on direction
 #
     def updateRSSI(self):
-        global bs
+        global topo
 
-        #print "+++++++++uR node", self.id, " and bs ", self.bs.id 
-        #print "node x,y", self.x, self.y
-        #print "main-bs x,y", bs[self.bs.id].x, bs[self.bs.id].y
+        # the gain towards every BS is computed with the topology, it
+        # depends on the angle between the main BS and the other BS
         for i in range(0,len(self.packet)):
-            #print "rssi before", self.packet[i].rssi
-            #print "packet bs", self.packet[i].bs
-            #print "packet bs x, y:", bs[self.packet[i].bs].x, bs[self.packet[i].bs].y            
-            if (self.bs.id == self.packet[i].bs):
-                #print "packet to main bs, increase rssi "
-                self.packet[i].rssi = self.packet[i].rssi + dir_30
-            else:
-                b1 = np.array([bs[self.bs.id].x, bs[self.bs.id].y])
-                p = np.array([self.x, self.y])
-                b2 = np.array([bs[self.packet[i].bs].x, bs[self.packet[i].bs].y])
-
-                ba = b1 - p
-                bc = b2 - p
-                #print ba
-                #print bc
-
-                cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-                angle = np.degrees(np.arccos(cosine_angle))
-
-                #print "angle: ", angle
-
-                if (angle <= 30):
-                    #print "rssi increase to other BS: 4"
-                    self.packet[i].rssi = self.packet[i].rssi + dir_30
-                elif angle <= 90:
-                    #print "rssi increase to other BS: 2"
-                    self.packet[i].rssi = self.packet[i].rssi + dir_90
-                elif angle <= 150:
-                    #print "rssi increase to other BS: -4"
-                    self.packet[i].rssi = self.packet[i].rssi + dir_150
-                else:
-                    #print "rssi increase to other BS: -3"
-                    self.packet[i].rssi = self.packet[i].rssi + dir_180
-            #print "packet rssi after", self.packet[i].rssi
+            self.packet[i].rssi = self.packet[i].rssi + float(topo['gain'][self.id, self.packet[i].bs])
 
 
 #
@@ -560,7 +568,7 @@ class myPacket():
         # log-shadow
         Lpl = Lpld0 + 10*gamma*math.log10(distance/d0)
         #print Lpl
-        Prx = Ptx - GL - Lpl
+        Prx = float(topo['rssi'][nodeid, bs])
         
         if (experiment == 3) or (experiment == 5):
             minairtime = 9999
@@ -626,29 +634,46 @@ class myPacket():
 # is maintained
 #       
 def transmit(env,node):
+    # a node restored from a checkpoint may be in the middle of a transmission
+    if node.inAir:
+        yield checkpoint.timeoutAt(env, node.wakeup)
+        receive(env, node)
+
     while True:
         # time before sending anything (include prop delay)
         # send up to 2 seconds earlier or later
-        yield env.timeout(random.expovariate(1.0/float(node.period)))
+        if node.wakeup is None:
+            if arrivalStreams:
+                node.wakeup = env.now + arrivalStreams.next(node.id)
+            else:
+                node.wakeup = env.now + random.expovariate(1.0/float(node.period))
+        yield checkpoint.timeoutAt(env, node.wakeup)
 
         # time sending and receiving
         # packet arrives -> add to base station
 
-        node.sent = node.sent + 1
+        if counted(env.now):
+            node.sent = node.sent + 1
 
         global packetSeq
         packetSeq = packetSeq + 1
 
         global nrBS
-        for bs in range(0, nrBS):
+        for bs in node.bsList:
            if (node in packetsAtBS[bs]):
                 print "ERROR: packet already in"
            else:
                 # adding packet if no collision
-                if (checkcollision(node.packet[bs])==1):
+                if sinr is not None:
+                    # decided when the packet ends
+                    node.packet[bs].collided = 0
+                    node.packet[bs].energy = channels.start(channelKey(node.packet[bs]),
+                                                            node.packet[bs].rssi, env.now)
+                elif (checkcollision(node.packet[bs])==1):
                     node.packet[bs].collided = 1
                     global nrCollisions
-                    nrCollisions = nrCollisions+1 
+                    if counted(env.now):
+                        nrCollisions = nrCollisions+1 
 
                 else:
                     node.packet[bs].collided = 0
@@ -657,47 +682,203 @@ def transmit(env,node):
                 node.packet[bs].seqNr = packetSeq
  
         # take first packet rectime        
-        yield env.timeout(node.packet[0].rectime)
+        node.inAir = True
+        node.wakeup = env.now + node.packet[0].rectime
+        yield checkpoint.timeoutAt(env, node.wakeup)
+        receive(env, node)
 
-        # if packet did not collide, add it in list of received packets
-        # unless it is already in
-        for bs in range(0, nrBS):
-            if node.packet[bs].lost:
-                lostPackets.append(node.packet[bs].seqNr)
+#
+# end of a transmission: count the packet at every BS and
+# remove it from the list of packets being processed
+#
+def receive(env,node):
+    global nrCollisions
+    node.inAir = False
+    node.wakeup = None
+    count = counted(node.packet[node.bsList[0]].addTime)
+
+    # cumulative interference: the packet collided if the mean interference
+    # during its airtime was too strong
+    if sinr is not None:
+        for bs in node.bsList:
+            p = node.packet[bs]
+            sir = channels.end(channelKey(p), p.rssi, p.energy, p.addTime, env.now)
+            if sir < sinr and not p.lost:
+                p.collided = 1
+                if count:
+                    nrCollisions = nrCollisions + 1
+
+    if tracer and count:
+        for bs in node.bsList:
+            p = node.packet[bs]
+            if p.lost:
+                outcome = packetTrace.LOST
+            elif p.collided:
+                outcome = packetTrace.COLLIDED
             else:
-                if node.packet[bs].collided == 0:
-                    if (nrNetworks == 1):
+                outcome = packetTrace.RECEIVED
+            tracer.add(node.id, p.bs, p.sf, p.freq, p.bw, p.addTime, p.rectime, env.now, p.rssi, outcome, p.seqNr)
+
+    # if packet did not collide, add it in list of received packets
+    # unless it is already in
+    nrRec = len(recPackets)
+    for bs in (node.bsList if count else []):
+        if node.packet[bs].lost:
+            lostPackets.append(node.packet[bs].seqNr)
+        else:
+            if node.packet[bs].collided == 0:
+                if (nrNetworks == 1):
+                    packetsRecBS[bs].append(node.packet[bs].seqNr)
+                else:
+                    # now need to check for right BS
+                    if (node.bs.id == bs):
                         packetsRecBS[bs].append(node.packet[bs].seqNr)
-                    else:
-                        # now need to check for right BS
-                        if (node.bs.id == bs):
-                            packetsRecBS[bs].append(node.packet[bs].seqNr)
-                    # recPackets is a global list of received packets
-                    # not updated for multiple networks        
-                    if (recPackets):
-                        if (recPackets[-1] != node.packet[bs].seqNr):
-                            recPackets.append(node.packet[bs].seqNr)
-                    else:
+                # recPackets is a global list of received packets
+                # not updated for multiple networks        
+                if (recPackets):
+                    if (recPackets[-1] != node.packet[bs].seqNr):
                         recPackets.append(node.packet[bs].seqNr)
                 else:
-                    # XXX only for debugging
-                    collidedPackets.append(node.packet[bs].seqNr)
-
-        # complete packet has been received by base station
-        # can remove it
-
-        for bs in range(0, nrBS):                    
-            if (node in packetsAtBS[bs]):
-                packetsAtBS[bs].remove(node)
-                # reset the packet
-                node.packet[bs].collided = 0
-                node.packet[bs].processed = 0
+                    recPackets.append(node.packet[bs].seqNr)
+            else:
+                # XXX only for debugging
+                collidedPackets.append(node.packet[bs].seqNr)
+
+    # received packets of a part are merged by node and transmission
+    if (channelPart or regionPart) and len(recPackets) > nrRec:
+        recIds.append(node.id*2**32 + node.sent)
+
+    # complete packet has been received by base station
+    # can remove it
+
+    for bs in node.bsList:
+        if (node in packetsAtBS[bs]):
+            packetsAtBS[bs].remove(node)
+            # reset the packet
+            node.packet[bs].collided = 0
+            node.packet[bs].processed = 0
+
+#
+# a packet is counted when it starts in the time window, see --window
+#
+def counted(start):
+    return windowPart is None or windowFrom <= start < windowTo
+
+#
+# channel of a packet in the cumulative interference model
+#
+def channelKey(p):
+    return (p.bs, p.freq, p.sf)
+
+#
+# the simulation state that is not rebuilt when the simulator starts with
+# the same arguments and seed
+#
+def checkpointState(nextCkpt):
+    return {
+        'args': (nrNodes, avgSendTime, experiment, nrBS, full_collision, directionality,
+                 nrNetworks, baseDist, seed, run, layout, bsFile, channelPart, regionPart, windowPart,
+                 sinr, arrivalKind, jitter),
+        'now': env.now,
+        'nextCkpt': nextCkpt,
+        'nodes': [(n.sent, n.inAir, n.wakeup,
+                   [(p.collided, getattr(p, 'addTime', None), getattr(p, 'seqNr', None)) for p in n.packet])
+                  for n in nodes],
+        'packetsAtBS': [[n.id for n in l] for l in packetsAtBS],
+        'packetSeq': packetSeq,
+        'nrCollisions': nrCollisions,
+        'recPackets': recPackets,
+        'collidedPackets': collidedPackets,
+        'lostPackets': lostPackets,
+        'packetsRecBS': packetsRecBS,
+        'random': random.getstate(),
+        'nprandom': np.random.get_state(),
+        'batches': batches,
+        'traceChunks': tracer.flush() if tracer else None,
+        'channels': channels,
+        'energy': [[getattr(p, 'energy', None) for p in n.packet] for n in nodes],
+        'arrivals': arrivalStreams.getstate() if arrivalStreams else None,
+        'recIds': recIds,
+    }
+
+def restoreCheckpoint(state):
+    global packetSeq
+    global nrCollisions
+    for n, (sent, inAir, wakeup, packets) in zip(nodes, state['nodes']):
+        n.sent = sent
+        n.inAir = inAir
+        n.wakeup = wakeup
+        for p, (collided, addTime, seqNr) in zip(n.packet, packets):
+            p.collided = collided
+            if addTime is not None:
+                p.addTime = addTime
+                p.seqNr = seqNr
+    for i in range(0, nrBS):
+        packetsAtBS[i][:] = [nodes[id] for id in state['packetsAtBS'][i]]
+        packetsRecBS[i][:] = state['packetsRecBS'][i]
+    packetSeq = state['packetSeq']
+    nrCollisions = state['nrCollisions']
+    recPackets[:] = state['recPackets']
+    collidedPackets[:] = state['collidedPackets']
+    lostPackets[:] = state['lostPackets']
+    random.setstate(state['random'])
+    np.random.set_state(state['nprandom'])
+    if tracer:
+        tracer.truncate(state['traceChunks'] or 0)
+    channels.channels = state['channels'].channels
+    if arrivalStreams:
+        arrivalStreams.setstate(state['arrivals'])
+    recIds[:] = state['recIds']
+    for n, energy in zip(nodes, state['energy']):
+        for p, e in zip(n.packet, energy):
+            p.energy = e
+
+#
+# counters for the batch means, see stats.py
+#
+def currentCounters():
+    sentBS = np.zeros(nrBS)
+    airtimeBS = np.zeros(nrBS)
+    for n in nodes:
+        sentBS[n.bs.id] = sentBS[n.bs.id] + n.sent
+        for bs in range(0, nrBS):
+            if not getattr(n.packet[bs], 'lost', False):
+                airtimeBS[bs] = airtimeBS[bs] + n.sent*n.packet[bs].rectime
+    return stats.counters(packetSeq, len(recPackets), nrCollisions, sentBS,
+                          [len(r) for r in packetsRecBS], airtimeBS)
+
+#
+# record the counters at the end of every batch and stop the simulation
+# when the DER is precise enough, the wall-clock budget is used up or
+# simtime is reached
+#
+def monitor(env, stop):
+    while batches.next <= simtime:
+        yield checkpoint.timeoutAt(env, batches.next)
+        batches.add(currentCounters())
+        if ciTarget and batches.converged(nrBS, ciTarget, truncate=warmup):
+            break
+        if budget and time.time() - wallStart >= budget:
+            break
+    else:
+        yield checkpoint.timeoutAt(env, simtime)
+    stop.succeed()
+
+#
+# save the simulation state periodically
+#
+def checkpointer(env, nextCkpt):
+    while True:
+        yield checkpoint.timeoutAt(env, nextCkpt)
+        nextCkpt = nextCkpt + ckptEvery
+        checkpoint.save(ckptFile, checkpointState(nextCkpt))
+
 #
 # "main" program
 #
 
 # get arguments
-if len(sys.argv) == 10:
+if len(sys.argv) >= 10:
     nrNodes = int(sys.argv[1])                       
     avgSendTime = int(sys.argv[2])
     experiment = int(sys.argv[3])
@@ -717,17 +898,129 @@ if len(sys.argv) == 10:
     print "with directionality: ", directionality
     print "nrNetworks: ", nrNetworks
     print "baseDist: ", baseDist   # x-distance between the two base stations
+    try:
+        opts, args = getopt.getopt(sys.argv[10:], '', ['layout=', 'bsfile=', 'seed=', 'topocache=', 'shm', 'shm-clean', 'topoonly', 'channelsonly', 'run=', 'result=', 'checkpoint=', 'ckpt-every=', 'resume', 'ci=', 'batch=', 'budget=', 'warmup', 'analytic', 'sweep=', 'progress=', 'progress-json=', 'trace=', 'sinr=', 'arrivals=', 'jitter=', 'channels=', 'region=', 'window='])
+    except getopt.GetoptError as e:
+        print e
+        exit(-1)
+    for opt, val in opts:
+        if opt == '--layout':
+            if val not in bsLayout.LAYOUTS:
+                print "unknown layout '%s', use one of %s" % (val, ', '.join(bsLayout.LAYOUTS))
+                print "usage: ./directionalLoraIntf.py <nodes> <avgsend> <experiment> <simtime> <collision> <directionality> <networks> <basedist> [options]"
+                exit(-1)
+            layout = val
+        elif opt == '--bsfile':
+            bsFile = val
+        elif opt == '--seed':
+            seed = int(val)
+        elif opt == '--topocache':
+            topoDir = val
+        elif opt == '--shm':
+            topoDir = topology.shmDir()
+        elif opt == '--shm-clean':
+            shmClean = True
+        elif opt == '--topoonly':
+            topoOnly = True
+        elif opt == '--channelsonly':
+            channelsOnly = True
+        elif opt == '--run':
+            run = int(val)
+        elif opt == '--result':
+            resultFile = val
+        elif opt == '--checkpoint':
+            ckptFile = val
+        elif opt == '--ckpt-every':
+            ckptEvery = float(val)
+        elif opt == '--resume':
+            resume = True
+        elif opt == '--ci':
+            ciTarget = float(val)
+        elif opt == '--batch':
+            batchLen = float(val)
+        elif opt == '--budget':
+            budget = float(val)
+        elif opt == '--warmup':
+            warmup = True
+        elif opt == '--analytic':
+            analyticOnly = True
+        elif opt == '--sweep':
+            sweep = sorted(set([int(n) for n in val.split(',')]))
+            nrNodes = sweep[-1]
+        elif opt == '--progress':
+            progressEvery = float(val)
+        elif opt == '--progress-json':
+            progressJson = val
+        elif opt == '--trace':
+            traceDir = val
+        elif opt == '--sinr':
+            sinr = float(val)
+        elif opt == '--arrivals':
+            arrivalKind = val
+        elif opt == '--jitter':
+            jitter = float(val)
+        elif opt in ('--channels', '--region', '--window'):
+            try:
+                part = partition.parsePart(val)
+            except ValueError as e:
+                print "%s: %s" % (opt, e)
+                print "usage: ./directionalLoraIntf.py <nodes> <avgsend> <experiment> <simtime> <collision> <directionality> <networks> <basedist> [options]"
+                exit(-1)
+            if opt == '--channels':
+                channelPart = part
+            elif opt == '--region':
+                regionPart = part
+            else:
+                windowPart = part
+    if budget is not None and ciTarget is None:
+        print "--budget only applies with --ci"
+        print "usage: ./directionalLoraIntf.py <nodes> <avgsend> <experiment> <simtime> <collision> <directionality> <networks> <basedist> [options]"
+        exit(-1)
+    print "layout: ", bsFile if bsFile else layout
 
 else:
-    print "usage: ./directionalLoraIntf.py <nodes> <avgsend> <experiment> <simtime> <collision> <directionality> <networks> <basedist>"
+    print "usage: ./directionalLoraIntf.py <nodes> <avgsend> <experiment> <simtime> <collision> <directionality> <networks> <basedist> [options]"
     print "experiment 0 and 1 use 1 frequency only"
     exit(-1)
 
 
+# the packets that start in [windowFrom, windowTo) are counted; the ones in
+# the air at windowFrom started at most one longest airtime (SF12, BW125,
+# CR4/8) earlier, and the last counted ones end at most one later
+if windowPart:
+    overlap = airtime(12, 4, 20, 125)
+    windowFrom = windowPart[0]*simtime/float(windowPart[1])
+    windowTo = (windowPart[0] + 1)*simtime/float(windowPart[1])
+    windowStart = max(0, windowFrom - overlap)
+    if windowPart[0] + 1 < windowPart[1]:
+        simtime = windowTo + overlap
+
+if seed is not None:
+    random.seed(seed + 1000003*run)
+    np.random.seed(seed + 1000003*run)
+
+# base station positions from a file fix the number of base stations
+if bsFile:
+    bsPos = bsLayout.fileLayout(bsFile)
+    if len(bsPos) != nrBS:
+        print "using %d base stations from %s" % (len(bsPos), bsFile)
+        nrBS = len(bsPos)
+
+# a resumed run starts at the time of the checkpoint
+ckptState = None
+if ckptFile and resume and os.path.isfile(ckptFile):
+    ckptState = checkpoint.load(ckptFile)
+    if ckptState['args'] != (nrNodes, avgSendTime, experiment, nrBS, full_collision, directionality,
+                             nrNetworks, baseDist, seed, run, layout, bsFile, channelPart, regionPart, windowPart,
+                             sinr, arrivalKind, jitter):
+        print "checkpoint %s was made with different arguments" % ckptFile
+        exit(-1)
+    print "resuming from %s at %.1f ms" % (ckptFile, ckptState['now'])
+
 # global stuff
 nodes = []
 packetsAtBS = []
-env = simpy.Environment()
+env = simpy.Environment(ckptState['now'] if ckptState else windowStart)
 
 
 # max distance: 300m in city, 3000 m outside (5 km Utz experiment)
@@ -779,6 +1072,39 @@ print "maxX ", maxX
 maxY = 2 * maxDist * math.sin(30*(math.pi/180)) # == maxdist
 print "maxY", maxY
 
+if not bsFile:
+    bsPos = bsLayout.makeLayout(layout, nrBS, maxDist, maxX, maxY, baseDist, seed)
+
+# node positions, distances and path loss (see topology.py)
+topo = None
+topoCreated = False
+if topoDir and seed is None:
+    print "no --seed given, not caching the topology"
+elif topoDir:
+    topoFile = os.path.join(topoDir, topology.cacheName(nrNodes, nrBS, baseDist, seed, bsFile or layout, maxDist))
+    if os.path.isfile(topoFile):
+        topo = topology.load(topoFile)
+        if topology.matches(topo, maxDist, bsPos):
+            bsPos = topo['bs']
+            print "topology loaded from %s" % topoFile
+        else:
+            print "topology in %s was placed with another maxDist or other base stations, rebuilding it" % topoFile
+            topo = None
+if topo is None:
+    topo = topology.build(nrNodes, bsPos, maxDist, seed, Ptx, GL, Lpld0, gamma, d0,
+                          (dir_30, dir_90, dir_150, dir_180))
+    if topoDir and seed is not None:
+        if not os.path.isdir(topoDir):
+            os.makedirs(topoDir)
+        topology.save(topoFile, topo)
+        topoCreated = True
+        if shmClean:
+            atexit.register(lambda: os.path.isfile(topoFile) and os.remove(topoFile))
+if topoOnly:
+    if resultFile and topoDir and seed is not None:
+        np.savez(resultFile, topoFile=topoFile, topoCreated=topoCreated)
+    exit(0)
+
 # prepare graphics and add sink
 if (graphics == 1):
     plt.ion()
@@ -809,6 +1135,33 @@ for i in range(0,nrNodes):
         # when we add directionality, we update the RSSI here
         if (directionality == 1):
             node.updateRSSI()
+
+# only the packets on a part of the channels or at a part of the BS,
+# see parallel.py
+if (channelPart or regionPart or windowPart) and not arrivalKind:
+    print "--channels, --region and --window need --arrivals, the traffic of a node must not depend on the other nodes"
+    exit(-1)
+if channelPart or channelsOnly:
+    loads = {}
+    for node in nodes:
+        for p in node.packet:
+            loads[channelKey(p)] = loads.get(channelKey(p), 0) + 1
+    if channelsOnly:
+        print "channels: %d" % len(loads)
+        exit(0)
+    mine = partition.share(loads, channelPart[0], channelPart[1])
+    for node in nodes:
+        node.bsList = [j for j in range(0, nrBS) if channelKey(node.packet[j]) in mine]
+if regionPart:
+    region = partition.regions(bsPos, regionPart[1])[regionPart[0]]
+    for node in nodes:
+        # the nodes of the region and the halo: nodes that reach a BS of it
+        if node.bs.id in region or [j for j in region if not getattr(node.packet[j], 'lost', False)]:
+            node.bsList = list(region)
+        else:
+            node.bsList = []
+for node in nodes:
+    if node.bsList:
         env.process(transmit(env,node))
 
 #prepare show
@@ -827,8 +1180,89 @@ with open('basestation.txt', 'w') as bfile:
     for basestation in bs:
         bfile.write('{x} {y} {id}\n'.format(**vars(basestation)))
 
+# analytic estimate only, see analytic.py
+# experiment 4 splits the SFs and channels by node id relative to nrNodes,
+# so the nodes of a run with n nodes are not the first n of a larger run:
+# they are created again for every count, with the same random draws
+if analyticOnly:
+    if sweep is None:
+        sweep = [nrNodes]
+    largest = nrNodes
+    estimates = []
+    for n in sweep:
+        if n != largest:
+            nrNodes = n
+            if seed is not None:
+                random.seed(seed + 1000003*run)
+                np.random.seed(seed + 1000003*run)
+            sweepNodes = []
+            for i in range(0,nrNodes):
+                for j in range(0,nrBS):
+                    node = myNode(i*nrBS+j, avgSendTime,20,bs[j])
+                    sweepNodes.append(node)
+                    if (directionality == 1):
+                        node.updateRSSI()
+        else:
+            nrNodes = largest
+            sweepNodes = nodes
+        estimates.append(analytic.estimate(analytic.settings(sweepNodes, nrBS), n, nrBS, full_collision, nrNetworks))
+    nrNodes = largest
+    fname = "exp" + str(experiment) + "d99" + "BS" + str(nrBS) + "Analytic.dat"
+    if os.path.isfile(fname):
+        res = ""
+    else:
+        res = "# Nodes      DER0                  Collisions"
+    print "# nodes   derALL     derALL2    collisions   DER per BS"
+    for e in estimates:
+        # collisions expected in simtime
+        collisions = e['collisionRate']*e['rate']*simtime
+        print "%-8d  %.6f   %.6f   %-10.1f   %s" % (e['nodes'], e['derALL'], e['derALL2'], collisions, " ".join(["%.6f" % d for d in e['der']]))
+        res = res + "\n" + str(e['nodes']) + "         " + str(e['derALL2']) +  "        " + str(collisions)
+    with open(fname, "a") as myfile:
+        myfile.write(res)
+    if resultFile:
+        np.savez(resultFile, nrNodes=sweep, nrBS=nrBS, experiment=experiment,
+                 derALL=[e['derALL'] for e in estimates], derALL2=[e['derALL2'] for e in estimates],
+                 der=[e['der'] for e in estimates], collisionRate=[e['collisionRate'] for e in estimates])
+    exit(0)
+
+if traceDir:
+    tracer = packetTrace.TraceWriter(traceDir)
+if arrivalKind:
+    arrivalStreams = arrivals.Arrivals(arrivalKind, avgSendTime, nrNodes*nrBS, seed, run, jitter,
+                                       window=windowPart[0] if windowPart else None)
+if ckptState:
+    restoreCheckpoint(ckptState)
+if ckptFile:
+    if ckptEvery is None:
+        ckptEvery = simtime/100.0
+    env.process(checkpointer(env, ckptState['nextCkpt'] if ckptState else ckptEvery))
+
 # start simulation
-env.run(until=simtime)
+reporter = None
+if progressEvery or progressJson:
+    reporter = progress.Progress(progressEvery or 10.0, simtime,
+                                 lambda: (packetSeq, [len(p) for p in packetsAtBS]),
+                                 text=progressEvery is not None, jsonFile=progressJson, run=run)
+batches = None
+if ciTarget or warmup:
+    if batchLen is None:
+        batchLen = 10.0*avgSendTime
+    if ckptState and ckptState['batches']:
+        batches = ckptState['batches']
+    else:
+        batches = stats.BatchMeans(batchLen, env.now, currentCounters())
+    wallStart = time.time()
+    stop = env.event()
+    env.process(monitor(env, stop))
+    progress.run(env, stop, reporter)
+else:
+    progress.run(env, simtime, reporter)
+if tracer:
+    tracer.close()
+if ciTarget:
+    derMean, derHW = batches.interval(nrBS, batches.warmup(nrBS) if warmup else 0)
+    print "stopped at %.1f ms after %d batches, derALL2 %.6f +- %.6f, widest BS interval +- %.6f (95%%)" % (env.now, batches.nrBatches(), derMean[0], derHW[0], np.nanmax(derHW[1:]) if len(derHW) > 1 else np.nan)
 
 # print stats and save into file
 print "nr received packets (independent of right base station)", len(recPackets)
@@ -857,10 +1291,16 @@ print "sumSent: ", sumSent
 
 der = []
 # data extraction rate
-derALL = len(recPackets)/float(sumSent)
+# a part of a parallel run may send no packets at all
+if sumSent == 0:
+    print "no traffic: no packets were sent"
+    derALL = float('nan')
+else:
+    derALL = len(recPackets)/float(sumSent)
 sumder = 0
 for i in range(0, nrBS):
-    der.append(len(packetsRecBS[i])/float(sent[i]))
+    # a part of a parallel run may have no nodes of a BS
+    der.append(len(packetsRecBS[i])/float(max(sent[i], 1)))
     print "DER BS[",i,"]:", der[i]
     sumder = sumder + der[i]
 avgDER = (sumder)/nrBS
@@ -869,8 +1309,22 @@ avgDER = (sumder)/nrBS
 if (graphics == 1):
     raw_input('Press Enter to continue ...')
 
-derALL2 = (len(recPackets) - nrCollisions) /float(sumSent)
+derALL2 = (len(recPackets) - nrCollisions) /float(sumSent) if sumSent else float('nan')
 print "derALL2:", derALL2
+
+# without the warm-up, everything counted from the end of the last warm-up batch
+warmupTime = 0
+if warmup:
+    skip = batches.warmup(nrBS)
+    warmupTime = skip*batchLen
+    steady = currentCounters() - batches.snapshots[skip]
+    nrCollisions = int(steady[2])
+    derALL2 = (steady[1] - steady[2])/steady[0] if steady[0] else float('nan')
+    der = list(steady[3 + nrBS:3 + 2*nrBS]/steady[3:3 + nrBS])
+    print "warm-up: %d of %d batches (%.1f ms) dropped" % (skip, batches.nrBatches(), warmupTime)
+    print "steady-state collisions:", nrCollisions
+    print "steady-state derALL2:", derALL2
+
 # save experiment data into a dat file that can be read by e.g. gnuplot
 # name of file would be:  exp0.dat for experiment 0
 fname = "exp" + str(experiment) + "d99" + "BS" + str(nrBS) + "Intf.dat"
@@ -882,3 +1336,13 @@ else:
 with open(fname, "a") as myfile:
     myfile.write(res)
 myfile.close()
+
+# counters of this run, e.g. for replications.py
+if resultFile:
+    np.savez(resultFile, nrNodes=nrNodes, nrBS=nrBS, experiment=experiment, run=run,
+             sent=sent, received=[len(r) for r in packetsRecBS], nrCollisions=nrCollisions,
+             nrReceived=len(recPackets), nrCollided=len(collidedPackets), nrLost=len(lostPackets),
+             sumSent=sumSent, der=der, derALL2=derALL2, simulated=env.now,
+             derMean=derMean if ciTarget else [], derHW=derHW if ciTarget else [],
+             warmup=warmupTime, nodeSent=[n.sent if n.bsList else -1 for n in nodes],
+             recIds=np.array(recIds, dtype=np.int64))
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+ Cumulative interference for directionalLoraIntf.py
+
+ powerCollision() compares a packet with one other packet at a time, so
+ several weaker packets that together drown it are not noticed. This model
+ keeps, for every (BS, frequency, SF), the sum of the linear power (mW) of
+ the packets in the air and the integral of that sum over time (energy).
+ Both are updated in O(1) when a packet starts or ends. When a packet ends,
+ its mean interference over its airtime is the energy added since it
+ started divided by its airtime, less its own power, and the packet is
+ received when its signal to interference ratio (SIR) is at least the
+ threshold.
+
+ Noise is left to the sensitivity check that marks packets as lost; lost
+ packets still add to the interference, as in checkcollision().
+"""
+
+import math
+
+
+def mW(dBm):
+    return 10.0**(dBm/10.0)
+
+
+class Interference():
+    def __init__(self):
+        # (bs, freq, sf) -> [power sum (mW), energy (mW ms), time of the
+        #                    last change, packets in the air]
+        self.channels = {}
+
+    def advance(self, key, now):
+        c = self.channels.get(key)
+        if c is None:
+            c = self.channels[key] = [0.0, 0.0, now, 0]
+        c[1] = c[1] + c[0]*(now - c[2])
+        c[2] = now
+        return c
+
+    #
+    # a packet with power rssi (dBm) starts; returns the energy of the
+    # channel at that time, which end() needs
+    #
+    def start(self, key, rssi, now):
+        c = self.advance(key, now)
+        c[0] = c[0] + mW(rssi)
+        c[3] = c[3] + 1
+        return c[1]
+
+    #
+    # a packet that started at time start with channel energy energy ends;
+    # returns its SIR (dB) against the mean interference over its airtime
+    #
+    def end(self, key, rssi, energy, start, now):
+        c = self.advance(key, now)
+        power = mW(rssi)
+        interference = (c[1] - energy)/(now - start) - power if now > start else 0.0
+        c[3] = c[3] - 1
+        # start from exactly 0 again when the channel is idle, so that
+        # rounding errors do not add up
+        c[0] = c[0] - power if c[3] else 0.0
+        if interference <= 1e-12*power:
+            return float('inf')
+        return 10*math.log10(power/interference)
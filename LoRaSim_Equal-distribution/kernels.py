@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+ Compiled kernels for replay.py
+
+ The collision rules of checkcollision() as a plain loop over the packets
+ sorted by BS and start time: for every packet, walk back over the packets
+ that started at most maxAirtime before it and apply frequencyCollision(),
+ sfCollision(), timingCollision() and powerCollision() to every one still in
+ the air. With Numba installed the loop is compiled (sweep); without it,
+ replay.py uses its NumPy implementation instead. sweepPython is the same
+ loop uncompiled, which is slow but useful to check the other two.
+
+ The collided flags do not influence the rules, so the order in which the
+ pairs are visited does not matter and all paths give the same flags.
+"""
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+#
+# set the collided flags for all pairs of overlapping packets, and the
+# counted flag of every packet that collides when it arrives; pairs of two
+# packets below nrCarry were resolved before and are skipped
+#
+def sweepPython(bs, start, end, airtime, sf, freq, bw, rssi, lost, order, maxAirtime,
+                fullCollision, powerThreshold, critical, nrCarry, collided, counted):
+    for a in range(len(order)):
+        j = order[a]
+        # lost packets don't collide
+        if lost[j]:
+            continue
+        b = a - 1
+        while b >= 0:
+            i = order[b]
+            if bs[i] != bs[j] or start[i] < start[j] - maxAirtime:
+                break
+            b = b - 1
+            if end[i] <= start[j] or (i < nrCarry and j < nrCarry):
+                continue
+            # frequencyCollision(), p1 = j, p2 = i
+            df = abs(int(freq[j]) - int(freq[i]))
+            if not ((df <= 120 and (bw[j] == 500 or freq[i] == 500)) or
+                    (df <= 60 and (bw[j] == 250 or freq[i] == 250)) or
+                    df <= 30):
+                continue
+            if sf[j] != sf[i]:
+                continue
+            if not fullCollision:
+                collided[i] = True
+                collided[j] = True
+                counted[j] = True
+                continue
+            # timingCollision()
+            tpreamb = 2.0**sf[j]/bw[j]*critical
+            if not start[j] + tpreamb < start[i] + airtime[i]:
+                continue
+            # powerCollision()
+            d = rssi[j] - rssi[i]
+            if abs(d) < powerThreshold:
+                collided[i] = True
+                collided[j] = True
+                counted[j] = True
+            elif d < powerThreshold:
+                collided[j] = True
+                counted[j] = True
+            else:
+                collided[i] = True
+
+
+if numba is not None:
+    sweep = numba.njit(sweepPython)
+else:
+    sweep = None
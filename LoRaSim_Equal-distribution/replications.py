@@ -0,0 +1,108 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+"""
+ SYNOPSIS:
+   ./replications.py <runs> <procs> <simulator arguments> [--script <file>]...
+ DESCRIPTION:
+    Runs <runs> replications of directionalLoraIntf.py on a single topology
+    with <procs> processes at a time. The simulator arguments are passed to
+    every run as they are and must include --seed. The topology is generated
+    once into shared memory (--shm) and every run maps that copy read-only,
+    so memory use does not grow with the number of processes. The topology
+    is deleted at the end if it was generated here; a topology that was
+    already in shared memory is left alone.
+
+    --script can be given several times to compare strategies, e.g. the
+    simulators of the other LoRaSim_* directories, on the same topology;
+    by default the simulator next to this file is used.
+ OUTPUT
+    Every run works in its own directory replications/<strategy>_run<k>,
+    with the simulator output in sim.log. A table with the DER of every run
+    and the mean and 95% confidence interval per strategy is printed.
+"""
+
+import os
+import sys
+import subprocess
+import numpy as np
+from multiprocessing.dummy import Pool
+from stats import halfWidth
+
+
+#
+# run one simulation, the output goes to sim.log in its own directory
+#
+def runJob(job):
+    cmd, workdir = job
+    if not os.path.isdir(workdir):
+        os.makedirs(workdir)
+    with open(os.path.join(workdir, 'sim.log'), 'w') as log:
+        return subprocess.call(cmd, cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+
+
+if len(sys.argv) < 12:
+    print ("usage: ./replications.py <runs> <procs> <simulator arguments> [--script <file>]...")
+    exit(-1)
+
+runs = int(sys.argv[1])
+procs = int(sys.argv[2])
+
+scripts = []
+simArgs = []
+args = sys.argv[3:]
+while args:
+    if args[0] == '--script':
+        scripts.append(os.path.abspath(args[1]))
+        args = args[2:]
+    else:
+        simArgs.append(args[0])
+        args = args[1:]
+if not scripts:
+    scripts = [os.path.join(os.path.dirname(os.path.abspath(__file__)), 'directionalLoraIntf.py')]
+if '--seed' not in simArgs:
+    print ("replications need a --seed to share the topology")
+    exit(-1)
+
+outDir = os.path.abspath('replications')
+if not os.path.isdir(outDir):
+    os.makedirs(outDir)
+
+# generate the topology once, all runs attach to it
+prepFile = os.path.join(outDir, 'topology.npz')
+prep = [sys.executable, scripts[0]] + simArgs + ['--shm', '--topoonly', '--result', prepFile]
+if runJob((prep, os.path.join(outDir, 'topology'))) != 0:
+    print ("could not generate the topology, see %s" % os.path.join(outDir, 'topology', 'sim.log'))
+    exit(-1)
+prep = np.load(prepFile)
+topoFile = str(prep['topoFile'])
+topoCreated = 'topoCreated' in prep.files and bool(prep['topoCreated'])
+print ("shared topology: %s" % topoFile)
+
+jobs = []
+results = []
+for script in scripts:
+    name = os.path.basename(os.path.dirname(script))
+    for k in range(runs):
+        workdir = os.path.join(outDir, "%s_run%d" % (name, k))
+        resFile = os.path.join(workdir, 'result.npz')
+        cmd = [sys.executable, script] + simArgs + ['--shm', '--run', str(k), '--result', resFile]
+        jobs.append((cmd, workdir))
+        results.append((name, k, resFile))
+
+pool = Pool(procs)
+codes = pool.map(runJob, jobs)
+pool.close()
+if topoCreated:
+    os.remove(topoFile)
+
+print ("# strategy                         run   derALL2     collisions")
+der = {}
+for (name, k, resFile), code in zip(results, codes):
+    if code != 0:
+        print ("%-32s %5d   failed (exit code %d)" % (name, k, code))
+        continue
+    res = np.load(resFile)
+    der.setdefault(name, []).append(float(res['derALL2']))
+    print ("%-32s %5d   %.6f    %d" % (name, k, res['derALL2'], res['nrCollisions']))
+for name in sorted(der):
+    print ("%-32s mean  %.6f +- %.6f (95%%, %d runs)" % (name, np.mean(der[name]), halfWidth(der[name]), len(der[name])))
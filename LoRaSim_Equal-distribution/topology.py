@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+ Node placement for directionalLoraIntf.py
+
+ A topology holds everything that only depends on where nodes and base
+ stations are: the base station positions, the node positions, the home base
+ station of every node and the node x base station distance and RSSI
+ matrices, plus the gain of the directional antenna of every node towards
+ every base station. It is generated in bulk with NumPy and can be stored in
+ a binary file (a sequence of .npy records) that is memory mapped when read
+ back, so that repeated runs on the same topology skip the placement entirely.
+
+ A topology cached in shared memory (shmDir) is a file on a tmpfs such as
+ /dev/shm: parallel workers that load it map the same pages read-only
+ instead of each building or unpickling their own copy.
+"""
+
+import os
+import math
+import tempfile
+import numpy as np
+
+# order in which the arrays are stored in a topology file; maxDist (the
+# placement radius, a one element array) is missing in older files
+FIELDS = ('bs', 'nodes', 'home', 'dist', 'rssi', 'gain', 'maxDist')
+
+# RAM backed file system used for shared topologies, if there is one
+SHM_DIR = '/dev/shm'
+
+
+#
+# file name of a cached topology; maxDist depends on the experiment (through
+# the sensitivity) and sets both the placement and the legacy BS positions
+#
+def cacheName(nrNodes, nrBS, baseDist, seed, layout, maxDist):
+    layout = os.path.splitext(os.path.basename(layout))[0]
+    return "topo_n%d_bs%d_d%g_r%g_s%d_%s.npy" % (nrNodes, nrBS, baseDist, maxDist, seed, layout)
+
+
+#
+# True when topo was placed with the radius maxDist around the base stations
+# bsPos; the name of a --bsfile says nothing about the positions in it
+#
+def matches(topo, maxDist, bsPos):
+    if 'maxDist' not in topo:
+        return False
+    if abs(float(topo['maxDist'][0]) - maxDist) > 1e-9*maxDist:
+        return False
+    bsPos = np.asarray(bsPos, dtype=np.float64)
+    return topo['bs'].shape == bsPos.shape and np.array_equal(topo['bs'], bsPos)
+
+
+#
+# place nrNodes nodes around each base station, uniformly in a disc of
+# radius maxDist (same procedure as the original per node placement)
+# node i*nrBS+j belongs to base station j
+#
+def placeNodes(nrNodes, bsPos, maxDist, seed=None):
+    nrBS = len(bsPos)
+    rng = np.random.RandomState(seed)
+    ab = np.sort(rng.random_sample((nrNodes*nrBS, 2)), axis=1)
+    a = ab[:, 0]
+    b = ab[:, 1]
+    home = np.tile(np.arange(nrBS), nrNodes)
+    nodes = np.empty((nrNodes*nrBS, 2))
+    nodes[:, 0] = b*maxDist*np.cos(2*math.pi*a/b) + bsPos[home, 0]
+    nodes[:, 1] = b*maxDist*np.sin(2*math.pi*a/b) + bsPos[home, 1]
+    return nodes, home
+
+
+#
+# RSSI change of a directional antenna that points at the home BS: dirGains
+# holds the gain for angles up to 30, 90, 150 and 180 degrees between the
+# home BS and the other BS as seen from the node
+#
+def directionalGains(nodes, home, bsPos, dirGains):
+    dir_30, dir_90, dir_150, dir_180 = dirGains
+    ba = bsPos[home][:, np.newaxis, :] - nodes[:, np.newaxis, :]
+    bc = bsPos[np.newaxis, :, :] - nodes[:, np.newaxis, :]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cosine_angle = (ba*bc).sum(axis=2) / (np.sqrt((ba*ba).sum(axis=2)) * np.sqrt((bc*bc).sum(axis=2)))
+        angle = np.degrees(np.arccos(cosine_angle))
+        gain = np.where(angle <= 30, dir_30,
+               np.where(angle <= 90, dir_90,
+               np.where(angle <= 150, dir_150, dir_180)))
+    gain[np.arange(len(nodes)), home] = dir_30
+    return gain.astype(np.float64)
+
+
+#
+# build a topology; the RSSI follows the log-distance path loss model
+# used by myPacket (without directional antennae, see 'gain' for those)
+#
+def build(nrNodes, bsPos, maxDist, seed, Ptx, GL, Lpld0, gamma, d0, dirGains):
+    bsPos = np.asarray(bsPos, dtype=np.float64)
+    nodes, home = placeNodes(nrNodes, bsPos, maxDist, seed)
+    diff = nodes[:, np.newaxis, :] - bsPos[np.newaxis, :, :]
+    dist = np.sqrt((diff*diff).sum(axis=2))
+    rssi = Ptx - GL - (Lpld0 + 10*gamma*np.log10(dist/d0))
+    gain = directionalGains(nodes, home, bsPos, dirGains)
+    return {'bs': bsPos, 'nodes': nodes, 'home': home, 'dist': dist, 'rssi': rssi, 'gain': gain,
+            'maxDist': np.array([maxDist], dtype=np.float64)}
+
+
+#
+# write a topology; the file is written under a temporary name and renamed,
+# so that concurrent runs never see a partial file
+#
+def save(fname, topo):
+    tmp = "%s.%d.tmp" % (fname, os.getpid())
+    with open(tmp, 'wb') as f:
+        for name in FIELDS:
+            np.lib.format.write_array(f, np.ascontiguousarray(topo[name]))
+    os.rename(tmp, fname)
+
+
+#
+# read a topology, every array is a read-only memory map into the file
+#
+def load(fname):
+    topo = {}
+    size = os.path.getsize(fname)
+    with open(fname, 'rb') as f:
+        for name in FIELDS:
+            if f.tell() >= size:
+                break
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            offset = f.tell()
+            topo[name] = np.memmap(fname, dtype=dtype, mode='r', offset=offset,
+                                   shape=shape, order='F' if fortran else 'C')
+            f.seek(offset + topo[name].nbytes)
+    return topo
+
+
+#
+# directory for topologies shared between processes
+#
+def shmDir():
+    if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK):
+        return SHM_DIR
+    return tempfile.gettempdir()
+
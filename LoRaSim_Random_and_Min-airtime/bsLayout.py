@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+ Base station layouts for directionalLoraIntf.py
+
+ Every layout function returns an (nrBS, 2) float array with the x and y
+ position of each base station, so that any number of base stations can be
+ placed at once instead of one hand written coordinate pair per id.
+"""
+
+import math
+import numpy as np
+
+# layouts understood by makeLayout()
+LAYOUTS = ('legacy', 'grid', 'hex', 'random')
+
+
+#
+# the positions that used to be hardcoded in myBS
+# returns None if nrBS is not one of the original set-ups
+#
+def legacyLayout(nrBS, maxDist, maxX, maxY, baseDist):
+    pos = np.zeros((nrBS, 2))
+    ids = np.arange(nrBS)
+
+    if nrBS == 1:
+        pos[0] = (maxDist, maxY)
+    elif nrBS == 2:
+        pos[0] = (maxDist, maxY)
+        pos[1] = (maxDist + baseDist, maxY)
+    elif nrBS == 3:
+        pos[0] = (maxDist + baseDist, maxY)
+        pos[1] = (maxDist, maxY)
+        pos[2] = (maxDist + 2*baseDist, maxY)
+    elif nrBS == 4:
+        pos[0] = (maxDist + baseDist, maxY)
+        pos[1] = (maxDist, maxY)
+        pos[2] = (maxDist + 2*baseDist, maxY)
+        pos[3] = (maxDist + baseDist, maxY + baseDist)
+    elif nrBS == 5:
+        pos[0] = (maxDist + baseDist, maxY + baseDist)
+        pos[1] = (maxDist, maxY + baseDist)
+        pos[2] = (maxDist + 2*baseDist, maxY + baseDist)
+        pos[3] = (maxDist + baseDist, maxY)
+        pos[4] = (maxDist + baseDist, maxY + 2*baseDist)
+    elif nrBS in (6, 8, 24, 96):
+        # rows of equally spaced base stations
+        rows = {6: 2, 8: 2, 24: 3, 96: 4}[nrBS]
+        cols = nrBS // rows
+        row = ids // cols
+        pos[:, 0] = (ids - row*cols + 1)*maxX/float(cols + 1)
+        pos[:, 1] = (row + 1)*maxY/float(rows + 1)
+    else:
+        return None
+    return pos
+
+
+#
+# square grid over the area [0,maxX] x [0,maxY], filled row by row
+# the number of columns is chosen so that the cells are roughly square
+#
+def gridLayout(nrBS, maxX, maxY):
+    cols = int(math.ceil(math.sqrt(nrBS*maxX/float(maxY))))
+    cols = max(1, min(cols, nrBS))
+    rows = int(math.ceil(nrBS/float(cols)))
+    ids = np.arange(nrBS)
+    pos = np.empty((nrBS, 2))
+    pos[:, 0] = (ids % cols + 1)*maxX/float(cols + 1)
+    pos[:, 1] = (ids // cols + 1)*maxY/float(rows + 1)
+    return pos
+
+
+#
+# hexagonal grid: every other row is shifted by half a column and the
+# row spacing is sqrt(3)/2 of the column spacing
+#
+def hexLayout(nrBS, maxX, maxY):
+    cols = int(math.ceil(math.sqrt(nrBS*maxX*math.sqrt(3)/(2.0*maxY))))
+    cols = max(1, min(cols, nrBS))
+    rows = int(math.ceil(nrBS/float(cols)))
+    dx = maxX/float(cols)
+    dy = dx*math.sqrt(3)/2.0
+    ids = np.arange(nrBS)
+    row = ids // cols
+    pos = np.empty((nrBS, 2))
+    pos[:, 0] = (ids % cols + 0.25 + 0.5*(row % 2))*dx
+    pos[:, 1] = maxY/2.0 + (row - (rows - 1)/2.0)*dy
+    return pos
+
+
+#
+# base stations uniformly at random in the area
+#
+def randomLayout(nrBS, maxX, maxY, seed=None):
+    rng = np.random.RandomState(seed)
+    return rng.uniform((0, 0), (maxX, maxY), size=(nrBS, 2))
+
+
+#
+# read base station positions from a file with one "x,y" (or "x y",
+# such as basestation.txt) per line; further columns are ignored
+#
+def fileLayout(fname):
+    with open(fname) as f:
+        first = f.readline()
+    delimiter = ',' if ',' in first else None
+    pos = np.genfromtxt(fname, delimiter=delimiter, comments='#', usecols=(0, 1))
+    pos = np.atleast_2d(pos)
+    # drop a header line, if any
+    return pos[~np.isnan(pos).any(axis=1)]
+
+
+#
+# build the layout with the given name
+# 'legacy' keeps the original positions and falls back to 'grid' for
+# numbers of base stations it does not know
+#
+def makeLayout(name, nrBS, maxDist, maxX, maxY, baseDist, seed=None):
+    if name == 'legacy':
+        pos = legacyLayout(nrBS, maxDist, maxX, maxY, baseDist)
+        if pos is not None:
+            return pos
+        print ("no legacy layout for %d base stations, using grid" % nrBS)
+        name = 'grid'
+    if name == 'grid':
+        return gridLayout(nrBS, maxX, maxY)
+    if name == 'hex':
+        return hexLayout(nrBS, maxX, maxY)
+    if name == 'random':
+        return randomLayout(nrBS, maxX, maxY, seed)
+    raise ValueError("unknown layout '%s', use one of %s" % (name, ', '.join(LAYOUTS)))
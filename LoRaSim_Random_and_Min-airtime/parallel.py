@@ -0,0 +1,181 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+"""
+ SYNOPSIS:
+   ./parallel.py <mode> <parts> <procs> <simulator arguments>
+ DESCRIPTION:
+    Runs one simulation of directionalLoraIntf.py as <parts> partial runs,
+    <procs> processes at a time, and merges their counters into the result
+    of the whole simulation. The simulator arguments are passed to every
+    part as they are.
+
+    channels
+        every part simulates a share of the channels (BS, frequency, SF),
+        see --channels. Packets on different channels never collide, so the
+        merged result is that of a single run with the same arguments.
+    region
+        every part simulates a region of the base stations, see --region,
+        with the nodes that belong to it and, as a halo, the nodes from
+        elsewhere that reach one of its base stations. Nodes that reach
+        none of them only add lost packets there, which are left out: the
+        merged result equals that of a single run unless such a packet
+        would have collided with one that reaches the BS (possible without
+        the full collision check, or within the capture threshold of a
+        packet at the edge of the sensitivity), and the count of lost
+        packets only covers the simulated ones.
+    window
+        every part simulates a time window of simtime, see --window, with
+        arrival streams of its own. Every packet is counted in the window
+        it starts in and the counters of the windows are added up; the
+        merged result is that of a single run with other random arrivals.
+    With channels, <parts> is capped at the number of channels the nodes
+    use (see --channelsonly), so that no part is left without traffic.
+    The traffic of every node must not depend on the other nodes, so
+    --arrivals poisson is added when no --arrivals is given. All parts
+    must build the same nodes, so a random --seed is added when none is
+    given.
+ OUTPUT
+    Every part works in its own directory parallel/<mode>_part<k>, with the
+    simulator output in sim.log. The merged counters are printed and
+    appended to expXd99BSYIntf.dat like the simulator does; with --result
+    they are also saved as in the simulator.
+"""
+
+import os
+import sys
+import subprocess
+import numpy as np
+from multiprocessing.dummy import Pool
+
+MODES = ('channels', 'region', 'window')
+
+
+#
+# run one part, the output goes to sim.log in its own directory
+#
+def runJob(job):
+    cmd, workdir = job
+    if not os.path.isdir(workdir):
+        os.makedirs(workdir)
+    with open(os.path.join(workdir, 'sim.log'), 'w') as log:
+        return subprocess.call(cmd, cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+
+
+#
+# number of channels (BS, frequency, SF) the nodes use, from a run with
+# --channelsonly
+#
+def countChannels(script, simArgs, workdir):
+    if not os.path.isdir(workdir):
+        os.makedirs(workdir)
+    out = subprocess.check_output([sys.executable, script] + simArgs + ['--channelsonly'], cwd=workdir)
+    for line in out.decode().splitlines():
+        if line.startswith('channels: '):
+            return int(line.split()[1])
+    raise RuntimeError("no number of channels in the output of --channelsonly")
+
+
+#
+# counters of the whole simulation from the results of the parts; every
+# packet at a BS is counted in exactly one part. With channels and region
+# every node is simulated in one or more parts, each with the same
+# transmissions; with window every transmission is counted in one part.
+#
+def merge(results, mode='channels'):
+    nrBS = int(results[0]['nrBS'])
+    if mode == 'window':
+        nodeSent = np.sum([np.maximum(r['nodeSent'], 0) for r in results], axis=0)
+        nrReceived = sum([int(r['nrReceived']) for r in results])
+    else:
+        nodeSent = np.max([r['nodeSent'] for r in results], axis=0)
+        nrReceived = len(np.unique(np.concatenate([r['recIds'] for r in results])))
+    home = np.arange(len(nodeSent)) % nrBS
+    sent = np.bincount(home, weights=np.maximum(nodeSent, 0), minlength=nrBS).astype(np.int64)
+    received = np.sum([r['received'] for r in results], axis=0)
+    merged = {
+        'nrNodes': int(results[0]['nrNodes']),
+        'nrBS': nrBS,
+        'experiment': int(results[0]['experiment']),
+        'run': int(results[0]['run']),
+        'sent': sent,
+        'received': received,
+        'nrCollisions': sum([int(r['nrCollisions']) for r in results]),
+        'nrReceived': nrReceived,
+        'nrCollided': sum([int(r['nrCollided']) for r in results]),
+        'nrLost': sum([int(r['nrLost']) for r in results]),
+        'sumSent': int(sent.sum()),
+        'simulated': max([float(r['simulated']) for r in results]),
+    }
+    merged['der'] = received/np.maximum(sent, 1).astype(np.float64)
+    merged['derALL2'] = (merged['nrReceived'] - merged['nrCollisions'])/float(max(merged['sumSent'], 1))
+    return merged
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 13 or sys.argv[1] not in MODES:
+        print ("usage: ./parallel.py <%s> <parts> <procs> <simulator arguments>" % '|'.join(MODES))
+        exit(-1)
+
+    mode = sys.argv[1]
+    parts = int(sys.argv[2])
+    procs = int(sys.argv[3])
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'directionalLoraIntf.py')
+
+    # the merged result goes to --result, the parts write their own
+    simArgs = list(sys.argv[4:])
+    resultFile = None
+    if '--result' in simArgs:
+        i = simArgs.index('--result')
+        resultFile = os.path.abspath(simArgs[i + 1])
+        del simArgs[i:i + 2]
+    if '--arrivals' not in simArgs:
+        print ("using --arrivals poisson")
+        simArgs = simArgs + ['--arrivals', 'poisson']
+    if '--seed' not in simArgs:
+        seed = np.random.randint(2**31)
+        print ("using --seed %d" % seed)
+        simArgs = simArgs + ['--seed', str(seed)]
+
+    outDir = os.path.abspath('parallel')
+    if mode == 'channels':
+        nrChannels = countChannels(script, simArgs, os.path.join(outDir, 'channels_count'))
+        if parts > nrChannels:
+            print ("only %d channels, using %d parts" % (nrChannels, nrChannels))
+            parts = nrChannels
+    jobs = []
+    resFiles = []
+    for k in range(parts):
+        workdir = os.path.join(outDir, "%s_part%d" % (mode, k))
+        resFile = os.path.join(workdir, 'result.npz')
+        partArgs = ['--%s' % mode, '%d/%d' % (k, parts)]
+        jobs.append(([sys.executable, script] + simArgs + partArgs + ['--result', resFile], workdir))
+        resFiles.append(resFile)
+
+    pool = Pool(procs)
+    codes = pool.map(runJob, jobs)
+    pool.close()
+    for (cmd, workdir), code in zip(jobs, codes):
+        if code != 0:
+            print ("part failed (exit code %d), see %s" % (code, os.path.join(workdir, 'sim.log')))
+            exit(-1)
+
+    m = merge([np.load(f) for f in resFiles], mode)
+    print ("nr received packets (independent of right base station) %d" % m['nrReceived'])
+    print ("nr collided packets %d" % m['nrCollided'])
+    print ("nr lost packets (not correct) %d" % m['nrLost'])
+    print ("nr collisions %d" % m['nrCollisions'])
+    for i in range(0, m['nrBS']):
+        print ("DER BS[%d]: %s" % (i, m['der'][i]))
+    print ("sumSent: %d" % m['sumSent'])
+    print ("derALL2: %s" % m['derALL2'])
+
+    # same file as the simulator
+    fname = "exp" + str(m['experiment']) + "d99" + "BS" + str(m['nrBS']) + "Intf.dat"
+    if os.path.isfile(fname):
+        res = "\n" + str(m['nrNodes']) + "         " + str(m['derALL2']) +  "        " + str(m['nrCollisions'])
+    else:
+        res = "# Nodes      DER0                  Collisions\n" + str(m['nrNodes']) + "         " + str(m['derALL2']) +  "        " + str(m['nrCollisions'])
+    with open(fname, "a") as myfile:
+        myfile.write(res)
+    if resultFile:
+        np.savez(resultFile, **m)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+ Partitions of a simulation for parallel.py
+
+ Every worker creates all nodes with the same seed and then only simulates
+ its share of the packets. A share is a set of keys (e.g. the channels
+ (bs, freq, sf), see channelKey() in the simulator); the keys are spread
+ over the workers so that every worker gets about the same load, in the
+ same way in every worker. A region is a group of neighbouring base
+ stations, see regions().
+"""
+
+import numpy as np
+
+
+#
+# the keys of part k of K: longest processing time first, i.e. the keys by
+# decreasing load, each to the part with the least load so far
+#
+def share(loads, k, K):
+    parts = [0]*K
+    mine = set()
+    for key in sorted(loads, key=lambda c: (-loads[c], c)):
+        p = parts.index(min(parts))
+        parts[p] = parts[p] + loads[key]
+        if p == k:
+            mine.add(key)
+    return mine
+
+
+#
+# parse "k/K"
+#
+def parsePart(val):
+    try:
+        k, K = [int(x) for x in val.split('/')]
+    except ValueError:
+        raise ValueError("part '%s' is not of the form k/K" % val)
+    if not 0 <= k < K:
+        raise ValueError("part %d/%d does not exist, use 0 <= k < K" % (k, K))
+    return k, K
+
+
+#
+# split the base stations into K regions of neighbouring base stations:
+# sorted by x (then y) and cut into K groups of (nearly) equal size
+#
+def regions(bsPos, K):
+    if K > len(bsPos):
+        raise ValueError("%d regions for %d base stations" % (K, len(bsPos)))
+    order = np.lexsort((bsPos[:, 1], bsPos[:, 0]))
+    return [sorted(r.tolist()) for r in np.array_split(order, K)]
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+ Progress reports for directionalLoraIntf.py
+
+ run() replaces env.run(): it steps through the events itself and, every
+ few seconds of wall-clock time, reports the simulated time reached, the
+ events processed per second, the packets sent so far, the packets in the
+ air at every base station and the estimated time to completion. The
+ report is printed as a line of text and/or appended as one JSON object
+ per line to a file, for scripts that run sweeps.
+
+ Stepping through the events does not change their order, so a run with
+ progress reports gives the same results as one without.
+"""
+
+import sys
+import time
+import json
+
+# number of events between two looks at the wall clock
+CHECK_EVENTS = 1000
+
+
+class Progress():
+    #
+    # every: seconds of wall-clock time between reports
+    # status: function that returns the packets sent so far and the list of
+    #         packets in the air at every BS
+    # text: print reports; jsonFile: file for JSON lines ('-' for stdout)
+    #
+    def __init__(self, every, simtime, status, text=True, jsonFile=None, run=0):
+        self.every = every
+        self.simtime = simtime
+        self.status = status
+        self.text = text
+        self.jsonFile = jsonFile
+        self.run = run
+        self.events = 0
+
+    def start(self, env):
+        self.wallStart = self.lastWall = time.time()
+        self.simStart = env.now
+        self.lastEvents = 0
+
+    def report(self, env, final=False):
+        now = time.time()
+        packets, inAir = self.status()
+        rate = (self.events - self.lastEvents)/max(now - self.lastWall, 1e-9)
+        done = env.now - self.simStart
+        if done > 0 and not final:
+            eta = (now - self.wallStart)*(self.simtime - env.now)/done
+        else:
+            eta = 0.0
+        if self.text:
+            print ("progress: %.1f of %.1f ms (%.1f%%), %d events (%.0f/s), %d packets, in the air %s, eta %.0f s"
+                   % (env.now, self.simtime, 100.0*env.now/self.simtime, self.events, rate,
+                      packets, inAir, eta))
+            sys.stdout.flush()
+        if self.jsonFile:
+            line = json.dumps({'run': self.run, 'wall': now - self.wallStart, 'now': env.now,
+                               'simtime': self.simtime, 'events': self.events,
+                               'eventsPerSec': rate, 'packets': packets, 'inAir': inAir,
+                               'eta': eta, 'final': final})
+            if self.jsonFile == '-':
+                print (line)
+                sys.stdout.flush()
+            else:
+                with open(self.jsonFile, 'a') as f:
+                    f.write(line + '\n')
+        self.lastWall = now
+        self.lastEvents = self.events
+
+
+#
+# env.run(until=until) with progress reports; until is a time or an event
+#
+def run(env, until, progress=None):
+    if progress is None:
+        return env.run(until=until)
+    if hasattr(until, 'callbacks'):
+        at = None
+        done = lambda: until.callbacks is None
+    else:
+        # stop before the events at time until, as env.run() does
+        at = float(until)
+        done = lambda: env.peek() >= at
+    progress.start(env)
+    while not done():
+        for i in range(CHECK_EVENTS):
+            env.step()
+            if done():
+                break
+        progress.events = progress.events + i + 1
+        if time.time() - progress.lastWall >= progress.every:
+            progress.report(env)
+    if at is not None:
+        # no events are left before at: this only sets env.now to at
+        env.run(until=at)
+    progress.report(env, final=True)
+    return None if at is not None else until.value
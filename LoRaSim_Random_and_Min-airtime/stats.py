@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+ Output analysis for directionalLoraIntf.py
+
+ The simulator records its cumulative counters at the end of every batch of
+ simulated time. The batches give confidence intervals for the DER (batch
+ means), which is used to stop a run as soon as the DER is known precisely
+ enough instead of always simulating the full simtime.
+
+ Every run starts with an empty network, so the first batches see fewer
+ collisions than the steady state. The warm-up is detected with MSER (the
+ truncation point that minimises the standard error of the remaining batch
+ means) on the occupancy of every gateway, i.e. the mean number of packets
+ in the air that reach it, and can be dropped from the results.
+"""
+
+import math
+import numpy as np
+
+# two-sided 95% quantiles of the t distribution, by degrees of freedom
+T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+       2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+       2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+#
+# 95% confidence interval half-width of the mean of values
+# (per column for a 2-d array)
+#
+def halfWidth(values):
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n < 2:
+        return np.nan*np.ones(values.shape[1:])
+    t = T95[n - 2] if n - 2 < len(T95) else 1.96
+    return t*np.std(values, axis=0, ddof=1)/math.sqrt(n)
+
+
+#
+# the counters recorded for every batch: total packets sent, received and
+# collided, then the packets sent to and received by every BS and the
+# airtime (ms) of all packets that reach every BS
+#
+def counters(sumSent, nrReceived, nrCollisions, sentBS, receivedBS, airtimeBS):
+    return np.concatenate(([sumSent, nrReceived, nrCollisions], sentBS, receivedBS, airtimeBS)).astype(np.float64)
+
+
+#
+# DER of every batch between consecutive snapshots: derALL2 in the first
+# column, the DER of every BS in the others (nan if a BS got no packets)
+#
+def batchDER(snapshots, nrBS):
+    delta = np.diff(np.asarray(snapshots), axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        derALL2 = (delta[:, 1] - delta[:, 2])/delta[:, 0]
+        derBS = delta[:, 3 + nrBS:3 + 2*nrBS]/delta[:, 3:3 + nrBS]
+    return np.column_stack((derALL2, derBS))
+
+
+#
+# mean number of packets in the air at every BS during every batch
+#
+def batchOccupancy(snapshots, nrBS, length):
+    delta = np.diff(np.asarray(snapshots), axis=0)
+    return delta[:, 3 + 2*nrBS:3 + 3*nrBS]/length
+
+
+#
+# MSER truncation point of a series: the number of leading values to drop
+# so that the standard error of the mean of the rest is smallest (at most
+# half of the series is dropped)
+#
+def mser(series):
+    x = np.asarray(series, dtype=np.float64)
+    k = len(x)
+    if k < 2:
+        return 0
+    # sums over x[d:] for every d
+    s1 = np.cumsum(x[::-1])[::-1]
+    s2 = np.cumsum((x*x)[::-1])[::-1]
+    n = np.arange(k, 0, -1, dtype=np.float64)
+    crit = (s2 - s1*s1/n)/(n*n)
+    return int(np.argmin(crit[:k//2 + 1]))
+
+
+#
+# snapshots of the counters at the end of every batch of simulated time
+#
+class BatchMeans():
+    def __init__(self, length, start, first):
+        self.length = length
+        self.next = start + length
+        self.snapshots = [first]
+
+    def add(self, snapshot):
+        self.snapshots.append(snapshot)
+        self.next = self.next + self.length
+
+    def nrBatches(self):
+        return len(self.snapshots) - 1
+
+    #
+    # number of warm-up batches: the largest MSER truncation point of the
+    # occupancy of all base stations
+    #
+    def warmup(self, nrBS):
+        occupancy = batchOccupancy(self.snapshots, nrBS, self.length)
+        return max([mser(occupancy[:, bs]) for bs in range(nrBS)] + [0])
+
+    #
+    # mean and 95% half-width of derALL2 and the DER of every BS, without
+    # the first skip batches
+    #
+    def interval(self, nrBS, skip=0):
+        der = batchDER(self.snapshots[skip:], nrBS)
+        mean = np.array([np.mean(c[~np.isnan(c)]) if (~np.isnan(c)).any() else np.nan for c in der.T])
+        hw = np.array([halfWidth(c[~np.isnan(c)]) for c in der.T])
+        return mean, hw
+
+    #
+    # the run can stop when there are at least minBatches batches and the
+    # half-width of derALL2 and of every BS DER is at most target; with
+    # truncate the warm-up batches do not count
+    #
+    def converged(self, nrBS, target, minBatches=10, truncate=False):
+        skip = self.warmup(nrBS) if truncate else 0
+        if self.nrBatches() - skip < minBatches:
+            return False
+        mean, hw = self.interval(nrBS, skip)
+        return bool(np.all(hw[~np.isnan(mean)] <= target))
@@ -0,0 +1,56 @@
+# count formulation of the model of lora-single-gen.py
+#
+# All nodes are interchangeable (same T_SF, same L, no positions), so a
+# solution only depends on how many nodes use every {cf,sf}:
+#   min MU
+#   st  MU >= N_cf,sf * T_SF * \Lambda   for every cf, sf
+#       \sum_{cf,sf} N_cf,sf = N
+#       N_cf,sf >= 0 integer
+# which has 48 integer variables instead of N*(8+6+48) binaries and none of
+# their symmetric solutions. decode() expands the counts into an assignment
+# of every node, and write_solution() writes it in the form of the CPLEX
+# solution log that parse-solution-log.py reads.
+import re
+from ntw_defs import * # defines some network-related parameters such as available CFs, SF, average tx rate,...
+
+# the variables of the count formulation
+def count_var(cf, sf):
+	return "N_{0}#{1}".format(cf, sf)
+
+# the counts in a CPLEX solution log ("display solution variables -"), as a
+# dictionary {(cf, sf): n}; {cf,sf} without nodes are not listed by CPLEX
+def read_counts(filename):
+	counts = dict()
+	sol_lines = False
+	for line in open(filename, 'r'):
+		if line.startswith('CPLEX> Incumbent solution'):
+			sol_lines = True # found where the solution starts
+		if sol_lines and line.startswith('N_'):
+			# line in the form N_CF<cf num>#SF<sf num>   <value>
+			m = re.match(r'N_(CF\d+)#(SF\d+)\s+(\S+)', line)
+			counts[(m.group(1), m.group(2))] = int(round(float(m.group(3))))
+	return counts
+
+# assignment of the nodes {1..N}: the first N_CF1,SF7 nodes to {CF1,SF7}, the
+# next ones to {CF1,SF8}, ...; a list of (node, cf, sf)
+def decode(counts):
+	nodes = []
+	for cf in CF:
+		for sf in SF:
+			for k in range(counts.get((cf, sf), 0)):
+				nodes.append((len(nodes) + 1, cf, sf))
+	return nodes
+
+# the assignment as CPLEX displays the values of the CF_i#cf and SF_i#sf
+# binaries that are 1
+def write_solution(f, nodes):
+	f.write("CPLEX> Incumbent solution\n")
+	f.write("Variable Name           Solution Value\n")
+	for n, cf, sf in nodes:
+		f.write("{0:<30}{1:.6f}\n".format("CF_{0}#{1}".format(n, cf), 1))
+		f.write("{0:<30}{1:.6f}\n".format("SF_{0}#{1}".format(n, sf), 1))
+	f.write("All other variables in the range 1-{0} are 0.\n".format(len(nodes)*2))
+
+# MU of a solution: the highest load of any {cf,sf}
+def utilization(counts):
+	return max([n*T_SF[sf]*L for (cf, sf), n in counts.items()] + [0])
@@ -0,0 +1,95 @@
+# which SFs every node of a simulated topology can use
+#
+# In the LoRaSim simulators a packet is lost at a base station when its
+# RSSI there is below the sensitivity of its SF (the sensi table), so a node
+# can use an SF when the RSSI of the node at its best base station is not
+# below the sensitivity of the SF (SENSI). The RSSI follows the link budget
+# of the simulators, Ptx - GL - (Lpld0 + 10 gamma log10(d/d0)) (rssi()), plus
+# for directional runs the gain of the antenna of the node towards every base
+# station (the 'gain' matrix), as myPacket and myNode.updateRSSI() compute it.
+# The topology is that of the simulators (see topology.py of LoRaSim_*):
+#   - a topology cache file of directionalLoraIntf.py --topocache (.npy
+#     records bs, nodes, home, dist, rssi, gain)
+#   - a .npz file with an 'rssi' or a 'dist' array (node x base station, or
+#     one value per node) and optionally 'gain'
+#   - disc:<radius>[:<seed>], nodes placed as the simulators do, uniformly
+#     in a disc of the radius (m) around a single base station (disc())
+# The result is a coverage mask for lp_writer.write(): feasible[n-1, j] is
+# True when node n can use SF[j].
+#
+# The simulators place the nodes within maxDist of their base station, and
+# maxDist is computed with e instead of 10 as base of the path loss, so every
+# node they place is at -122.6 dBm or better and can use every SF: the mask
+# of such a topology is all True and the model is the full one. The mask only
+# leaves variables out for topologies placed over a larger radius: with
+# disc:400 only the nodes within about 170 m (a fifth of them) keep SF7 and
+# only half of them keep SF9; beyond about 413 m (e.g. disc:500) nodes are
+# out of range of every SF and are left out.
+import os
+import zipfile
+import numpy as np
+from ntw_defs import * # defines some network-related parameters such as available CFs, SF, average tx rate,...
+
+# order of the arrays in a topology cache file of the simulators (older files have no maxDist)
+FIELDS = ('bs', 'nodes', 'home', 'dist', 'rssi', 'gain', 'maxDist')
+
+# link budget of the simulators (directionalLoraIntf.py)
+PTX = 14
+GL = 0
+LPLD0 = 127.41
+GAMMA = 2.08
+D0 = 40.0
+# gain of a directional antenna towards the base station it points at (dir_30)
+DIR_GAIN = 4
+
+# RSSI at distance dist (m)
+def rssi(dist):
+	return PTX - GL - (LPLD0 + 10*GAMMA*np.log10(np.asarray(dist, dtype=float)/D0))
+
+# N nodes uniformly in a disc of radius around a base station at the origin, placed
+# as placeNodes() of topology.py of LoRaSim_* does
+def disc(N, radius, seed=None):
+	rng = np.random.RandomState(seed)
+	ab = np.sort(rng.random_sample((N, 2)), axis=1)
+	a = ab[:, 0]
+	b = ab[:, 1]
+	nodes = np.stack([b*radius*np.cos(2*np.pi*a/b), b*radius*np.sin(2*np.pi*a/b)], axis=1)
+	dist = np.sqrt((nodes*nodes).sum(axis=1))[:, None]
+	return {'bs': np.zeros((1, 2)), 'nodes': nodes, 'home': np.zeros(N, dtype=int), 'dist': dist,
+		'rssi': rssi(dist), 'gain': np.full((N, 1), float(DIR_GAIN))}
+
+# the arrays of a topology file, or of disc:<radius>[:<seed>] with N nodes
+def read_topology(filename, N=None):
+	if filename.startswith('disc:'):
+		args = filename.split(':')[1:]
+		return disc(N, float(args[0]), int(args[1]) if len(args) > 1 else None)
+	if zipfile.is_zipfile(filename):
+		with np.load(filename) as f:
+			return dict((name, f[name]) for name in f.files)
+	topo = {}
+	size = os.path.getsize(filename)
+	with open(filename, 'rb') as f:
+		for name in FIELDS:
+			if f.tell() >= size:
+				break
+			topo[name] = np.lib.format.read_array(f)
+	return topo
+
+# RSSI of every node at its best base station; with gain, with the gain of the directional antennae
+def best_rssi(topo, gain=False):
+	prx = np.asarray(topo['rssi'] if 'rssi' in topo else rssi(topo['dist']), dtype=float)
+	if gain:
+		prx = prx + np.asarray(topo['gain'], dtype=float).reshape(prx.shape)
+	if prx.ndim == 1:
+		return prx
+	return prx.max(axis=1)
+
+# the coverage mask of nodes with RSSI prx, a len(prx) x len(SF) matrix; as in the
+# simulators, a packet is only lost below the sensitivity
+def feasible(prx):
+	return np.asarray(prx)[:, None] >= np.array([SENSI[sf] for sf in SF])[None, :]
+
+# the coverage mask of the nodes of a topology file (see read_topology()); with
+# gain, of a directional run
+def read(filename, gain=False, N=None):
+	return feasible(best_rssi(read_topology(filename, N), gain))
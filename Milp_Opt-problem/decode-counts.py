@@ -0,0 +1,18 @@
+# expands the solution of the count formulation into one CF and SF per node
+# usage: python3 decode-counts.py <count solution log> <solution log>
+# the output has the form of a CPLEX solution log of lora-single-gen.py, for parse-solution-log.py
+import sys
+import count_model
+
+if len(sys.argv) > 2:
+	COUNT_FN=sys.argv[1]
+	SOLUTION_FN=sys.argv[2]
+else:
+	print("usage: python3 decode-counts.py <count solution log> <solution log>")
+	exit()
+
+counts = count_model.read_counts(COUNT_FN)
+nodes = count_model.decode(counts)
+with open(SOLUTION_FN, 'w') as f:
+	count_model.write_solution(f, nodes)
+print("{0} nodes, MU {1:.8f}".format(len(nodes), count_model.utilization(counts)))
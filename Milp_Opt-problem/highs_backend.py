@@ -0,0 +1,127 @@
+# solves the model of lora-single-gen.py (or its count formulation, see
+# count_model.py) in-process with the open-source HiGHS solver of SciPy
+# (scipy.optimize.milp), without writing a LP file or reading a CPLEX log
+#
+# The constraint matrix is built as a sparse matrix with the columns
+#   MU, CF_n,cf (N x len(CF)), SF_n,sf (N x len(SF)), Z_n,cf,sf (N x len(CF) x len(SF))
+# and the same rows as lp_writer.py writes. A solution is returned as arrays:
+# cf[n-1] and sf[n-1] are the indices in CF and SF of the settings of node n.
+try:
+	import numpy as np
+	from scipy.optimize import milp, LinearConstraint, Bounds
+	from scipy.sparse import coo_matrix
+	import warm_start # uses numpy
+except ImportError:
+	milp = None
+from ntw_defs import * # defines some network-related parameters such as available CFs, SF, average tx rate,...
+
+NCF = len(CF)
+NSF = len(SF)
+
+# load of one node on every sf: T_SF * \Lambda
+def loads():
+	return np.array([T_SF[sf]*L for sf in SF])
+
+def check():
+	if milp is None:
+		raise ImportError("the HiGHS backend needs numpy and scipy (>= 1.9)")
+
+# column indices of the variables
+def columns(N):
+	cf = 1 + np.arange(N*NCF).reshape(N, NCF)
+	sf = 1 + N*NCF + np.arange(N*NSF).reshape(N, NSF)
+	z = 1 + N*(NCF + NSF) + np.arange(N*NCF*NSF).reshape(N, NCF, NSF)
+	return cf, sf, z
+
+# the model as (c, constraints, integrality, bounds) for scipy.optimize.milp
+def model(N):
+	check()
+	cf, sf, z = columns(N)
+	nvars = 1 + N*(NCF + NSF + NCF*NSF)
+	rows = []
+	cols = []
+	vals = []
+	lb = []
+	ub = []
+	def add(r, c, v):
+		rows.append(np.ravel(r))
+		cols.append(np.ravel(c))
+		vals.append(np.broadcast_to(v, np.shape(c)).ravel().astype(float))
+	# MU - \sum_{n \in \{1..N\}} CF_{n,cf} . SF_{n,sf} . T_{SF} * \Lambda >= 0
+	load_row = np.arange(NCF*NSF).reshape(NCF, NSF)
+	add(load_row, np.zeros(NCF*NSF, dtype=int), 1)
+	add(np.broadcast_to(load_row, z.shape), z, np.broadcast_to(-loads(), z.shape))
+	lb.append(np.zeros(NCF*NSF))
+	ub.append(np.full(NCF*NSF, np.inf))
+	nrows = NCF*NSF
+	# all nodes are assigned exactly one CF and exactly one SF
+	add(nrows + np.repeat(np.arange(N), NCF), cf, 1)
+	nrows = nrows + N
+	add(nrows + np.repeat(np.arange(N), NSF), sf, 1)
+	nrows = nrows + N
+	lb.append(np.ones(2*N))
+	ub.append(np.ones(2*N))
+	# Z_i,cf,sf - CF_i,cf <= 0, Z_i,cf,sf - SF_i,sf <= 0, Z_i,cf,sf - CF_i,cf - SF_i,sf >= -1
+	link = np.arange(N*NCF*NSF).reshape(N, NCF, NSF)
+	cfz = np.broadcast_to(cf[:, :, None], z.shape)
+	sfz = np.broadcast_to(sf[:, None, :], z.shape)
+	for k, terms in enumerate([[(z, 1), (cfz, -1)], [(z, 1), (sfz, -1)], [(z, 1), (cfz, -1), (sfz, -1)]]):
+		for c, v in terms:
+			add(nrows + 3*link + k, c, v)
+	lb.append(np.tile([-np.inf, -np.inf, -1], N*NCF*NSF))
+	ub.append(np.tile([0, 0, np.inf], N*NCF*NSF))
+	nrows = nrows + 3*N*NCF*NSF
+	A = coo_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(nrows, nvars)).tocsr()
+	c = np.zeros(nvars)
+	c[0] = 1
+	integrality = np.ones(nvars)
+	integrality[0] = 0
+	upper = np.ones(nvars)
+	upper[0] = np.inf
+	return c, LinearConstraint(A, np.concatenate(lb), np.concatenate(ub)), integrality, Bounds(np.zeros(nvars), upper)
+
+# the count formulation: MU and the N_cf,sf
+def count_model(N):
+	check()
+	A = np.zeros((NCF*NSF + 1, 1 + NCF*NSF))
+	A[:NCF*NSF, 0] = 1
+	A[np.arange(NCF*NSF), 1 + np.arange(NCF*NSF)] = -np.tile(loads(), NCF)
+	A[NCF*NSF, 1:] = 1
+	lb = np.concatenate([np.zeros(NCF*NSF), [N]])
+	ub = np.concatenate([np.full(NCF*NSF, np.inf), [N]])
+	integrality = np.ones(1 + NCF*NSF)
+	integrality[0] = 0
+	upper = np.full(1 + NCF*NSF, np.inf)
+	return np.eye(1, 1 + NCF*NSF)[0], LinearConstraint(A, lb, ub), integrality, Bounds(np.zeros(1 + NCF*NSF), upper)
+
+# status of scipy.optimize.milp when it stops at the time limit
+TIME_LIMIT = 1
+
+# solves for N nodes; returns (cf, sf, MU, optimal), optimal being False when
+# HiGHS stopped at time_limit. scipy.optimize.milp takes no MIP start, so a
+# start (cf, sf), e.g. warm_start.greedy(N), is used as incumbent: its MU
+# bounds MU, and it is returned (not optimal) when HiGHS reaches the time
+# limit without a solution. Raises RuntimeError when HiGHS finds no solution
+# for any other reason (infeasible, error, time limit without a start).
+def solve(N, counts=False, time_limit=None, start=None):
+	c, constraints, integrality, bounds = (count_model if counts else model)(N)
+	options = {}
+	if time_limit is not None:
+		options['time_limit'] = time_limit
+	if start is not None:
+		start_mu = warm_start.utilization(*start)
+		bounds.ub[0] = start_mu*(1 + 1e-9)
+	res = milp(c, constraints=constraints, integrality=integrality, bounds=bounds, options=options)
+	if res.x is None:
+		if start is not None and res.status == TIME_LIMIT:
+			return start[0], start[1], start_mu, False
+		raise RuntimeError("HiGHS found no solution (status {0}): {1}".format(res.status, res.message))
+	optimal = res.status == 0
+	x = np.round(res.x[1:]).astype(int)
+	if counts:
+		# the first N_CF1,SF7 nodes on {CF1,SF7}, ... as in count_model.decode()
+		k = np.repeat(np.arange(NCF*NSF), x)
+		return k // NSF, k % NSF, res.x[0], optimal
+	cf = x[:N*NCF].reshape(N, NCF).argmax(axis=1)
+	sf = x[N*NCF:N*(NCF + NSF)].reshape(N, NSF).argmax(axis=1)
+	return cf, sf, res.x[0], optimal
@@ -0,0 +1,26 @@
+# generates LP algebraic representation of the count formulation (see count_model.py) for CPLEX
+# usage: python3 lora-count-gen.py [N] [output file]
+# without an output file the LP goes to stdout; *.mps and *.mps.gz are written in MPS format, *.gz compressed
+import sys
+import lp_writer # streams the model, see lp_writer.py
+
+DFT_N = 10
+
+# number of nodes can be passed as argument
+if len(sys.argv) > 1:
+	try:
+		N=int(sys.argv[1])
+	except ValueError:
+		N=DFT_N
+else:
+	N=DFT_N
+
+# output file can be passed as second argument
+if len(sys.argv) > 2:
+	OUT_FN=sys.argv[2]
+else:
+	OUT_FN=None
+
+print("Number of Nodes: {0}".format(N), file=sys.stderr)
+
+lp_writer.write(N, OUT_FN, counts=True)
@@ -0,0 +1,23 @@
+# writes the greedy assignment of the approximate algorithm as a CPLEX MIP start (see warm_start.py)
+# usage: python3 lora-greedy-start.py [N] [output file]
+import sys
+import warm_start
+
+DFT_N = 10
+
+# number of nodes can be passed as argument
+if len(sys.argv) > 1:
+	try:
+		N=int(sys.argv[1])
+	except ValueError:
+		N=DFT_N
+else:
+	N=DFT_N
+
+cf, sf = warm_start.greedy(N)
+print("Greedy start for {0} nodes: MU {1:.8f}".format(N, warm_start.utilization(cf, sf)), file=sys.stderr)
+if len(sys.argv) > 2:
+	with open(sys.argv[2], 'w') as f:
+		warm_start.write_mst(f, cf, sf)
+else:
+	warm_start.write_mst(sys.stdout, cf, sf)
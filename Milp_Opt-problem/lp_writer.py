@@ -0,0 +1,223 @@
+# streams the model of lora-single-gen.py to a file in LP or MPS format
+#
+# No dictionary of the Z variables is built: the rows and columns of one
+# node are the same for every node but for its number, so they are formatted
+# once as a text template with the node as "{0}", and written for all nodes
+# in large blocks into a buffered (or gzip compressed) file. Only the load
+# rows, which have a term for every node, are written term by term.
+#
+# The count formulation (write_count_lp, write_count_mps) only has the number of nodes on every
+# {cf,sf}, see count_model.py.
+#
+# With a coverage mask (feasible[n-1, j] for node n and SF[j], see coverage.py) only the variables
+# and rows of the SFs a node can use are written, and nodes without any are left out. Nodes with
+# the same SFs share a template, so the model is still written by blocks of nodes.
+import sys
+import gzip
+import numpy as np
+from ntw_defs import * # defines some network-related parameters such as available CFs, SF, average tx rate,...
+from count_model import count_var
+
+# terms per line of a LP row (CPLEX limits the length of a line)
+TERMS_PER_LINE = 8
+
+# nodes written per block
+BLOCK = 1024
+
+# buffer size of the output file
+BUFFER = 1 << 20
+
+# variable names, as read back by parse-solution-log.py
+def cf_var(n, cf):
+	return "CF_{0}#{1}".format(n, cf)
+
+def sf_var(n, sf):
+	return "SF_{0}#{1}".format(n, sf)
+
+# Z_i,cf,sf = CF_i,cf * SF_i,sf linearizes the product of the two binaries
+def z_var(n, cf, sf):
+	return "Z_{0}#{1}#{2}".format(n, cf, sf)
+
+def load_row(cf, sf):
+	return "load_{0}#{1}".format(cf, sf)
+
+# load of one node on {cf,sf}: T_SF * \Lambda
+def load(sf):
+	return T_SF[sf]*L
+
+# rows of one node that can use the SFs sfs: (name, sense, rhs, [(coefficient, variable), ...])
+def node_rows(n, sfs=SF):
+	rows = []
+	# the node is assigned exactly one CF and exactly one SF
+	rows.append(("cf_{0}".format(n), "=", 1, [(1, cf_var(n, cf)) for cf in CF]))
+	rows.append(("sf_{0}".format(n), "=", 1, [(1, sf_var(n, sf)) for sf in sfs]))
+	# Each Z_i,cf,sf requires the following contraints:
+	# Z_i,cf,sf <= CF_i,cf
+	# Z_i,cf,sf <= SF_i,sf
+	# Z_i,cf,sf >= CF_i,cf + SF_i,sf - 1
+	for cf in CF:
+		for sf in sfs:
+			z = "{0}#{1}#{2}".format(n, cf, sf)
+			rows.append(("zcf_" + z, "<=", 0, [(1, z_var(n, cf, sf)), (-1, cf_var(n, cf))]))
+			rows.append(("zsf_" + z, "<=", 0, [(1, z_var(n, cf, sf)), (-1, sf_var(n, sf))]))
+			rows.append(("zand_" + z, ">=", -1, [(1, z_var(n, cf, sf)), (-1, cf_var(n, cf)), (-1, sf_var(n, sf))]))
+	return rows
+
+# the same coefficients by column, as MPS needs them: (variable, [(row, coefficient), ...])
+def node_columns(n, sfs=SF):
+	columns = []
+	for cf in CF:
+		columns.append((cf_var(n, cf), [("cf_{0}".format(n), 1)] +
+			[(r + "_{0}#{1}#{2}".format(n, cf, sf), -1) for sf in sfs for r in ("zcf", "zand")]))
+	for sf in sfs:
+		columns.append((sf_var(n, sf), [("sf_{0}".format(n), 1)] +
+			[(r + "_{0}#{1}#{2}".format(n, cf, sf), -1) for cf in CF for r in ("zsf", "zand")]))
+	for cf in CF:
+		for sf in sfs:
+			z = "{0}#{1}#{2}".format(n, cf, sf)
+			# CF_{i,cf} . SF_{i,sf} . T_{SF} * \Lambda in the load row of {cf,sf}
+			columns.append((z_var(n, cf, sf), [(load_row(cf, sf), -load(sf)),
+				("zcf_" + z, 1), ("zsf_" + z, 1), ("zand_" + z, 1)]))
+	return columns
+
+# binary variables of one node
+def node_binaries(n, sfs=SF):
+	return [var for var, entries in node_columns(n, sfs)]
+
+def number(x):
+	return "{0:.10g}".format(x)
+
+# one term of a LP row, the first one without the "+"
+def lp_term(coef, var, first=False):
+	if coef == 1:
+		s = "+ " + var
+	elif coef == -1:
+		s = "- " + var
+	elif coef < 0:
+		s = "- {0} {1}".format(number(-coef), var)
+	else:
+		s = "+ {0} {1}".format(number(coef), var)
+	if first and s.startswith("+ "):
+		return s[2:]
+	return s
+
+def lp_row(name, sense, rhs, terms):
+	terms = [lp_term(c, v, k == 0) for k, (c, v) in enumerate(terms)]
+	lines = [" ".join(terms[i:i + TERMS_PER_LINE]) for i in range(0, len(terms), TERMS_PER_LINE)]
+	return "{0}: {1} {2} {3}\n".format(name, "\n ".join(lines), sense, rhs)
+
+# the text of one node for every node of nodes, BLOCK nodes per write
+def write_nodes(f, nodes, template):
+	for i in range(0, len(nodes), BLOCK):
+		f.write("".join(map(template.format, nodes[i:i + BLOCK])))
+
+# groups of nodes that can use the same SFs: [(sfs, node numbers), ...]; all N nodes can use
+# all SFs without a coverage mask, nodes that can use none are left out
+def node_groups(N, feasible=None):
+	if feasible is None:
+		return [(SF, range(1, N+1))]
+	feasible = np.asarray(feasible, dtype=bool)[:N]
+	pattern = feasible.dot(1 << np.arange(len(SF)))
+	groups = []
+	for p in np.unique(pattern[pattern > 0]):
+		groups.append((tuple(sf for j, sf in enumerate(SF) if p >> j & 1), (np.flatnonzero(pattern == p) + 1).tolist()))
+	return groups
+
+# nodes that can use the SF of index j
+def sf_nodes(N, feasible, j):
+	if feasible is None:
+		return range(1, N+1)
+	return (np.flatnonzero(np.asarray(feasible, dtype=bool)[:N, j]) + 1).tolist()
+
+def write_lp(f, N, feasible=None):
+	f.write("min\nobj: MU\n\nst\n")
+	# MU is at least the load of every {cf,sf}
+	# MU - \sum_{n \in \{1..N\}} CF_{n,cf} . SF_{n,sf} . T_{SF} * \Lambda >= 0
+	for cf in CF:
+		for j, sf in enumerate(SF):
+			nodes = sf_nodes(N, feasible, j)
+			f.write("{0}: MU".format(load_row(cf, sf)))
+			term = " " + lp_term(-load(sf), z_var("{0}", cf, sf))
+			for i in range(0, len(nodes), TERMS_PER_LINE):
+				f.write("\n" + "".join(map(term.format, nodes[i:i + TERMS_PER_LINE])))
+			f.write(" >= 0\n")
+	groups = node_groups(N, feasible)
+	for sfs, nodes in groups:
+		write_nodes(f, nodes, "".join(lp_row(*row) for row in node_rows("{0}", sfs)))
+	f.write("\nbinaries\n")
+	for sfs, nodes in groups:
+		write_nodes(f, nodes, "".join(var + "\n" for var in node_binaries("{0}", sfs)))
+	f.write("\nend\n")
+
+MPS_SENSE = {">=": "G", "<=": "L", "=": "E"}
+
+def write_mps(f, N, feasible=None):
+	groups = node_groups(N, feasible)
+	f.write("NAME lora\nROWS\n N obj\n")
+	f.write("".join(" G {0}\n".format(load_row(cf, sf)) for cf in CF for sf in SF))
+	for sfs, nodes in groups:
+		write_nodes(f, nodes, "".join(" {0} {1}\n".format(MPS_SENSE[sense], name) for name, sense, rhs, terms in node_rows("{0}", sfs)))
+	f.write("COLUMNS\n")
+	f.write(" MU obj 1\n")
+	f.write("".join(" MU {0} 1\n".format(load_row(cf, sf)) for cf in CF for sf in SF))
+	for sfs, nodes in groups:
+		write_nodes(f, nodes, "".join(" {0} {1} {2}\n".format(var, row, number(coef))
+			for var, entries in node_columns("{0}", sfs) for row, coef in entries))
+	f.write("RHS\n")
+	for sfs, nodes in groups:
+		write_nodes(f, nodes, "".join(" rhs {0} {1}\n".format(name, rhs) for name, sense, rhs, terms in node_rows("{0}", sfs) if rhs != 0))
+	f.write("BOUNDS\n")
+	for sfs, nodes in groups:
+		write_nodes(f, nodes, "".join(" BV bnd {0}\n".format(var) for var in node_binaries("{0}", sfs)))
+	f.write("ENDATA\n")
+
+# count formulation: N_cf,sf nodes on {cf,sf}, general integers
+def write_count_lp(f, N):
+	f.write("min\nobj: MU\n\nst\n")
+	# MU - N_{cf,sf} * T_{SF} * \Lambda >= 0
+	for cf in CF:
+		for sf in SF:
+			f.write(lp_row(load_row(cf, sf), ">=", 0, [(1, "MU"), (-load(sf), count_var(cf, sf))]))
+	# all nodes are assigned exactly one {cf,sf}
+	f.write(lp_row("nodes", "=", N, [(1, count_var(cf, sf)) for cf in CF for sf in SF]))
+	f.write("\ngeneral\n")
+	f.write("".join(count_var(cf, sf) + "\n" for cf in CF for sf in SF))
+	f.write("\nend\n")
+
+def write_count_mps(f, N):
+	f.write("NAME lora_count\nROWS\n N obj\n")
+	f.write("".join(" G {0}\n".format(load_row(cf, sf)) for cf in CF for sf in SF))
+	f.write(" E nodes\n")
+	f.write("COLUMNS\n")
+	f.write(" MU obj 1\n")
+	f.write("".join(" MU {0} 1\n".format(load_row(cf, sf)) for cf in CF for sf in SF))
+	f.write(" MARKER 'MARKER' 'INTORG'\n")
+	f.write("".join(" {0} {1} {2}\n {0} nodes 1\n".format(count_var(cf, sf), load_row(cf, sf), number(-load(sf)))
+		for cf in CF for sf in SF))
+	f.write(" MARKER 'MARKER' 'INTEND'\n")
+	f.write("RHS\n rhs nodes {0}\n".format(N))
+	f.write("ENDATA\n")
+
+# output file: stdout without a name, gzip compressed for *.gz
+def open_output(filename):
+	if filename is None:
+		return sys.stdout
+	if filename.endswith(".gz"):
+		return gzip.open(filename, "wt", compresslevel=1)
+	return open(filename, "w", buffering=BUFFER)
+
+# writes the model for N nodes, in MPS format for *.mps and *.mps.gz, else LP;
+# with counts the count formulation, with feasible only the SFs of the coverage mask
+def write(N, filename=None, counts=False, feasible=None):
+	if counts and feasible is not None:
+		raise ValueError("the count formulation has no nodes, it cannot take a coverage mask")
+	mps = filename is not None and (filename.endswith(".mps") or filename.endswith(".mps.gz"))
+	f = open_output(filename)
+	try:
+		if counts:
+			(write_count_mps if mps else write_count_lp)(f, N)
+		else:
+			(write_mps if mps else write_lp)(f, N, feasible)
+	finally:
+		if f is not sys.stdout:
+			f.close()
@@ -0,0 +1,73 @@
+# exact solver of the min-max problem of lora-single-gen.py, without a MILP
+#
+# All CFs are alike, so the problem only depends on how many nodes are on
+# every {cf,sf}: a {cf,sf} holds at most floor(MU / (T_SF * \Lambda)) nodes
+# under MU, and the optimal MU is the smallest load k * T_SF * \Lambda of
+# any sf for which these capacities add up to N. It lies between the LP
+# bound N / (len(CF) * \sum_{sf} 1/(T_SF * \Lambda)) and that bound plus
+# len(SF) / \sum_{sf} 1/(T_SF * \Lambda), so only a few k per sf are tried,
+# whatever N: the cost is that of building the cf and sf arrays (well under
+# a second for millions of nodes).
+#
+# Of the capacities, the fastest SFs are filled first, which also gives the
+# lowest total utilization (highest success probability) for the optimal MU.
+# The MU found is proven optimal (the gap is 0); the LP bound is returned
+# besides, as a check that does not rely on the counting: no assignment can
+# have a lower MU.
+# balance() takes the loads and the number of CFs as arguments, so that it
+# can be used by the simulators as well.
+import numpy as np
+from ntw_defs import * # defines some network-related parameters such as available CFs, SF, average tx rate,...
+
+NCF = len(CF)
+NSF = len(SF)
+
+# tolerance of floor(MU / load) for MU = k * load
+EPS = 1e-9
+
+# number of nodes every {cf,sf} can hold under mu, a ncf x len(loads) matrix
+def capacity(mu, loads, ncf):
+	return np.tile(np.floor(mu / loads + EPS).astype(int), (ncf, 1))
+
+# lower bound of MU of the LP relaxation: the N nodes spread fractionally
+# so that every {cf,sf} has the same load
+def lp_bound(N, loads, ncf):
+	return float(N) / (ncf * (1 / np.asarray(loads, dtype=float)).sum())
+
+# the optimal MU for N nodes
+def optimum(N, loads, ncf):
+	loads = np.asarray(loads, dtype=float)
+	if N <= 0:
+		return 0.0
+	s = (1 / loads).sum()
+	lb = lp_bound(N, loads, ncf)
+	ub = (float(N) / ncf + len(loads)) / s
+	# candidates k * load between the bounds (one more k each side for rounding)
+	k = np.ceil(lb / loads)[:, None] - 1 + np.arange(len(loads) + 3)[None, :]
+	mu = np.unique(k * loads[:, None])
+	mu = mu[(mu > 0) & (mu <= ub*(1 + EPS))]
+	cap = ncf * np.floor(mu[:, None] / loads[None, :] + EPS).sum(axis=1)
+	return mu[np.argmax(cap >= N)]
+
+# the number of nodes on every {cf,sf} (a ncf x len(loads) matrix) and MU
+def balance(N, loads, ncf):
+	loads = np.asarray(loads, dtype=float)
+	mu = optimum(N, loads, ncf)
+	counts = capacity(mu, loads, ncf)
+	# fill the fastest SFs first: the excess is taken from the slowest ones
+	order = np.argsort(loads, kind='stable')[::-1]
+	per_sf = counts[:, order].sum(axis=0)
+	excess = per_sf.sum() - N
+	drop = np.minimum(per_sf, np.maximum(0, excess - np.concatenate([[0], np.cumsum(per_sf)[:-1]])))
+	for j, d in zip(order, drop):
+		# spread over the CFs
+		counts[:, j] = counts[:, j] - (d // ncf + (np.arange(ncf) < d % ncf))
+	return counts, (counts * loads).max() if N > 0 else 0.0
+
+# solves for N nodes; returns (cf, sf, MU, optimal, LP bound) like
+# highs_backend.solve() with the LP bound added, optimal always being True
+def solve(N):
+	loads = np.array([T_SF[sf]*L for sf in SF])
+	counts, mu = balance(N, loads, NCF)
+	k = np.repeat(np.arange(NCF*NSF), counts.ravel())
+	return k // NSF, k % NSF, mu, True, lp_bound(N, loads, NCF)
@@ -39,6 +39,10 @@ T_SF={"SF7": 56.57600000000001, "SF8": 102.912, "SF9": 185.344, "SF10": 370.688,
 
 avgSendTime = 1000000 # milisegundos
 
+# sensitivity (dBm) of every SF at BW 125 kHz, the sensi table of the LoRaSim simulators (measured values, see paper, Table 3)
+# a node can only use the SFs whose sensitivity is below its RSSI (see coverage.py)
+SENSI={"SF7": -126.5, "SF8": -127.25, "SF9": -131.25, "SF10": -132.75, "SF11": -134.5, "SF12": -133.25}
+
 L = 1/avgSendTime 
 
 # g sub-band
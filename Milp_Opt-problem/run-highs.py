@@ -0,0 +1,62 @@
+# solves the optimization problem in-process with HiGHS (see highs_backend.py), no CPLEX needed
+# usage: python3 run-highs.py [N] [node|count] [solution log] [time limit (s) or -] [cache dir]
+# count solves the count formulation (see count_model.py); the solution log has the form of a CPLEX log, for parse-solution-log.py
+# the greedy assignment is the start (see warm_start.py), and the result when nothing better is found in time
+# with a cache dir (see solution_cache.py), a cached solution of N is used without solving, else the solution of the nearest
+# cached N is the start when it is better than the greedy one; solutions proven optimal are added to the cache
+import sys
+import time
+import highs_backend
+import count_model
+import warm_start
+import solution_cache
+from ntw_defs import * # defines some network-related parameters such as available CFs, SF, average tx rate,...
+
+DFT_N = 10
+
+# number of nodes can be passed as argument
+if len(sys.argv) > 1:
+	try:
+		N=int(sys.argv[1])
+	except ValueError:
+		N=DFT_N
+else:
+	N=DFT_N
+
+COUNTS = len(sys.argv) > 2 and sys.argv[2] == 'count'
+
+if len(sys.argv) > 4 and sys.argv[4] != '-':
+	TIME_LIMIT=float(sys.argv[4])
+else:
+	TIME_LIMIT=None
+
+if len(sys.argv) > 5:
+	CACHE_DIR=sys.argv[5]
+else:
+	CACHE_DIR=None
+
+FORMULATION = 'count' if COUNTS else 'node'
+
+print("Number of Nodes: {0}".format(N), file=sys.stderr)
+
+start = time.time()
+cached = solution_cache.get(N, FORMULATION, CACHE_DIR) if CACHE_DIR else None
+if cached is not None:
+	cf, sf, mu = cached
+	print("MU {0:.8f} (cached, {1})".format(mu, solution_cache.filename(N, FORMULATION, CACHE_DIR)))
+else:
+	greedy = warm_start.greedy(N)
+	print("greedy start: MU {0:.8f}".format(warm_start.utilization(*greedy)))
+	near = solution_cache.start(N, FORMULATION, CACHE_DIR) if CACHE_DIR else None
+	if near is not None:
+		print("cached start: MU {0:.8f}".format(warm_start.utilization(*near)))
+		if warm_start.utilization(*near) < warm_start.utilization(*greedy):
+			greedy = near
+	cf, sf, mu, optimal = highs_backend.solve(N, counts=COUNTS, time_limit=TIME_LIMIT, start=greedy)
+	print("MU {0:.8f} ({1}, {2:.3f} s)".format(mu, "optimal" if optimal else "not proven optimal", time.time() - start))
+	if CACHE_DIR and optimal:
+		solution_cache.put(N, cf, sf, mu, FORMULATION, CACHE_DIR)
+
+if len(sys.argv) > 3:
+	with open(sys.argv[3], 'w') as f:
+		count_model.write_solution(f, [(n + 1, CF[cf[n]], SF[sf[n]]) for n in range(N)])
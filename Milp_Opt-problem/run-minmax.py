@@ -0,0 +1,29 @@
+# solves the optimization problem exactly by counting (see minmax_solver.py), no MILP solver needed
+# usage: python3 run-minmax.py [N] [solution log]
+# the solution log has the form of a CPLEX log, for parse-solution-log.py
+import sys
+import time
+import minmax_solver
+import count_model
+from ntw_defs import * # defines some network-related parameters such as available CFs, SF, average tx rate,...
+
+DFT_N = 10
+
+# number of nodes can be passed as argument
+if len(sys.argv) > 1:
+	try:
+		N=int(sys.argv[1])
+	except ValueError:
+		N=DFT_N
+else:
+	N=DFT_N
+
+print("Number of Nodes: {0}".format(N), file=sys.stderr)
+
+start = time.time()
+cf, sf, mu, optimal, bound = minmax_solver.solve(N)
+print("MU {0:.8f} ({1}, LP bound {2:.8f}, {3:.3f} s)".format(mu, "optimal" if optimal else "not proven optimal", bound, time.time() - start))
+
+if len(sys.argv) > 2:
+	with open(sys.argv[2], 'w') as f:
+		count_model.write_solution(f, [(n + 1, CF[cf[n]], SF[sf[n]]) for n in range(N)])
@@ -0,0 +1,12 @@
+#!/bin/sh
+#executes the count formulation of the optimization problem (see count_model.py); first argument of the script is the number of nodes (if not passed default value in lora-count-gen.py will be used)
+LP_FILENAME="problem-count.lp"
+COUNT_FILENAME="solution-count.log"
+SOL_FILENAME="solution.log"
+echo "Running..."
+python3 lora-count-gen.py $1 $LP_FILENAME
+cplex -c "read $LP_FILENAME" "optimize" "display solution variables -" > $COUNT_FILENAME
+rm -f clone*log
+python3 decode-counts.py $COUNT_FILENAME $SOL_FILENAME
+python3 parse-solution-log.py $SOL_FILENAME
+cp $SOL_FILENAME solution$1.log
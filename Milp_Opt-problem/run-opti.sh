@@ -2,10 +2,13 @@
 #executes the optimization problem; first argument of the script is the number of nodes (if not passed default value in lora-single-gen.py will be used)
 LP_FILENAME="problem.lp"
 SOL_FILENAME="solution.log"
+MST_FILENAME="start.mst"
 echo "Running..."
-python3 lora-single-gen.py $1 > $LP_FILENAME 
+python3 lora-single-gen.py $1 $LP_FILENAME
+# MIP start: greedy assignment, see warm_start.py
+python3 lora-greedy-start.py $1 $MST_FILENAME
 #cplex -c "read $LP_FILENAME" "set mip limits solutions 1" "optimize" "display solution variables -" > $SOL_FILENAME
-cplex -c "read $LP_FILENAME" "set workmem 45000" "optimize" "display solution variables -" > $SOL_FILENAME
+cplex -c "read $LP_FILENAME" "read $MST_FILENAME" "set workmem 45000" "optimize" "display solution variables -" > $SOL_FILENAME
 rm clone*log
 python3 parse-solution-log.py $SOL_FILENAME 
 cp $SOL_FILENAME solution$1.log
@@ -0,0 +1,91 @@
+# persistent cache of solved assignments
+#
+# An optimal assignment only depends on N, CF, SF, T_SF and avgSendTime of
+# ntw_defs.py and on the formulation, so solutions are stored under a hash
+# of those (key()) in <cache dir>/<key>/N<N>.npz, with the cf and sf arrays
+# (indices in CF and SF, as solution_io.read() returns them) and MU. When a
+# formulation changes, its VERSION must be raised so that the old solutions
+# are no longer found.
+#
+# For an N without a solution, start() adapts the solution of the nearest
+# cached N: nodes are added to (or taken from) the {cf,sf} as the greedy
+# assignment of warm_start.py does, which gives a good MIP start.
+import os
+import re
+import json
+import hashlib
+import numpy as np
+from ntw_defs import * # defines some network-related parameters such as available CFs, SF, average tx rate,...
+
+# versions of the formulations (lora-single-gen.py and lora-count-gen.py)
+VERSION = {'node': 1, 'count': 1}
+
+DFT_DIR = "cache"
+
+NCF = len(CF)
+NSF = len(SF)
+
+# hash of the parameters of the model
+def key(formulation='node'):
+	params = {'CF': list(CF), 'SF': list(SF), 'T_SF': [T_SF[sf] for sf in SF], 'avgSendTime': avgSendTime,
+		'formulation': formulation, 'version': VERSION[formulation]}
+	return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+def directory(formulation='node', cache_dir=DFT_DIR):
+	return os.path.join(cache_dir, key(formulation))
+
+def filename(N, formulation='node', cache_dir=DFT_DIR):
+	return os.path.join(directory(formulation, cache_dir), "N{0}.npz".format(N))
+
+# (cf, sf, MU) of N, or None
+def get(N, formulation='node', cache_dir=DFT_DIR):
+	fn = filename(N, formulation, cache_dir)
+	if not os.path.isfile(fn):
+		return None
+	with np.load(fn) as f:
+		return f['cf'], f['sf'], float(f['MU'])
+
+def put(N, cf, sf, mu, formulation='node', cache_dir=DFT_DIR):
+	fn = filename(N, formulation, cache_dir)
+	if not os.path.isdir(os.path.dirname(fn)):
+		os.makedirs(os.path.dirname(fn))
+	# write and rename, so that concurrent runs never read half a file
+	tmp = "{0}.{1}.tmp.npz".format(fn[:-4], os.getpid())
+	np.savez(tmp, cf=cf, sf=sf, MU=mu)
+	os.replace(tmp, fn)
+
+# the cached N nearest to N, or None
+def nearest(N, formulation='node', cache_dir=DFT_DIR):
+	d = directory(formulation, cache_dir)
+	if not os.path.isdir(d):
+		return None
+	cached = [int(m.group(1)) for m in (re.match(r'N(\d+)\.npz$', f) for f in os.listdir(d)) if m]
+	if not cached:
+		return None
+	return min(cached, key=lambda n: (abs(n - N), n))
+
+# start for N from the nearest cached solution: (cf, sf), or None
+def start(N, formulation='node', cache_dir=DFT_DIR):
+	near = nearest(N, formulation, cache_dir)
+	if near is None:
+		return None
+	cf, sf, mu = get(near, formulation, cache_dir)
+	return adapt(cf, sf, N)
+
+# an assignment of N nodes from one of another number of nodes: the nodes of
+# the {cf,sf} with the highest utilization are removed first, new nodes go to
+# the {cf,sf} with the lowest utilization with them added
+def adapt(cf, sf, N):
+	load = np.array([T_SF[s]*L for s in SF])
+	counts = np.bincount(cf*NSF + sf, minlength=NCF*NSF).reshape(NCF, NSF)
+	n = counts.sum()
+	while n > N:
+		i, j = np.unravel_index(np.argmax(np.where(counts > 0, counts*load, -1)), counts.shape)
+		counts[i, j] = counts[i, j] - 1
+		n = n - 1
+	while n < N:
+		i, j = np.unravel_index(np.argmin((counts + 1)*load), counts.shape)
+		counts[i, j] = counts[i, j] + 1
+		n = n + 1
+	k = np.repeat(np.arange(NCF*NSF), counts.ravel())
+	return k // NSF, k % NSF
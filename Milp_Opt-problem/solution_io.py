@@ -0,0 +1,91 @@
+# reads the solution of the optimization problem in one pass over the file
+#
+# The settings of the nodes are kept as arrays: cf[n-1] and sf[n-1] are the
+# indices in CF and SF of the settings of node n (-1 when the solution has
+# none), as highs_backend.solve() returns them. The statistics of
+# parse-solution-log.py follow from the len(CF) x len(SF) matrix of the
+# number of nodes on every {cf,sf}.
+#
+# Formats:
+#   - the log of "display solution variables -" of CPLEX (solution.log),
+#     values after the "CPLEX> Incumbent solution" line only
+#   - CPLEX solution files (.sol, XML, <variable name=... value=.../>)
+#   - "<name> <value>" lines, as in the solution files of HiGHS, CBC and
+#     Gurobi, CBC with the column index in front ("<index> <name> <value>
+#     <reduced cost>"; other lines are skipped): files named *.sol, or any
+#     file with values=True
+# Other files are taken for CPLEX logs. A file without any variable raises
+# ValueError (e.g. a CPLEX log of a problem without a solution).
+# Counts N_cf#sf of the count formulation are expanded as count_model.decode() does.
+import re
+import itertools
+import numpy as np
+from ntw_defs import * # defines some network-related parameters such as available CFs, SF, average tx rate,...
+
+NCF = len(CF)
+NSF = len(SF)
+
+CF_INDEX = dict((cf, i) for i, cf in enumerate(CF))
+SF_INDEX = dict((sf, i) for i, sf in enumerate(SF))
+
+# CF_<node>#CF<cf num>, SF_<node>#SF<sf num> and N_CF<cf num>#SF<sf num> with their value, after
+# the column index of CBC if any
+VARIABLE = re.compile(r'\s*(?:\d+\s+)?(?:(CF|SF)_(\d+)#((?:CF|SF)\d+)|N_(CF\d+)#(SF\d+))\s+(\S+)')
+XML_VARIABLE = re.compile(r'<variable\s[^>]*name="(?:(CF|SF)_(\d+)#((?:CF|SF)\d+)|N_(CF\d+)#(SF\d+))"[^>]*value="([^"]+)"')
+
+# the cf and sf arrays of the solution in filename; values=True reads a "<name> <value>" file whatever its name
+def read(filename, values=None):
+	nodes = {'CF': [], 'SF': []}
+	settings = {'CF': [], 'SF': []}
+	counts = np.zeros((NCF, NSF), dtype=int)
+	found = 0
+	with open(filename, 'r') as f:
+		first = f.readline()
+		if first.startswith('<?xml'):
+			variable = XML_VARIABLE.search
+			sol_lines = True
+		else:
+			variable = VARIABLE.match
+			# the CPLEX log has the solution after the "Incumbent solution" line, other files everywhere
+			sol_lines = values if values is not None else filename.endswith('.sol')
+		for line in itertools.chain([first], f):
+			if line.startswith('CPLEX> Incumbent solution'):
+				sol_lines = True # found where the solution starts
+			if not sol_lines:
+				continue
+			m = variable(line)
+			if m is None:
+				continue
+			found = found + 1
+			kind, node, setting, count_cf, count_sf, value = m.groups()
+			if kind:
+				if float(value) > 0.5:
+					nodes[kind].append(int(node))
+					settings[kind].append((CF_INDEX if kind == 'CF' else SF_INDEX)[setting])
+			else:
+				counts[CF_INDEX[count_cf], SF_INDEX[count_sf]] = int(round(float(value)))
+	if found == 0:
+		raise ValueError("no solution variables in {0}".format(filename))
+	if counts.any():
+		# the first N_CF1,SF7 nodes on {CF1,SF7}, ...
+		k = np.repeat(np.arange(NCF*NSF), counts.ravel())
+		return k // NSF, k % NSF
+	N = max(nodes['CF'] + nodes['SF'] + [0])
+	cf = np.full(N, -1)
+	sf = np.full(N, -1)
+	cf[np.array(nodes['CF'], dtype=int) - 1] = settings['CF']
+	sf[np.array(nodes['SF'], dtype=int) - 1] = settings['SF']
+	return cf, sf
+
+# number of nodes on every {cf,sf}, a len(CF) x len(SF) matrix
+def count_matrix(cf, sf):
+	ok = (cf >= 0) & (sf >= 0)
+	return np.bincount(cf[ok]*NSF + sf[ok], minlength=NCF*NSF).reshape(NCF, NSF)
+
+# utilization of every {cf,sf}: N_{cf,sf} * T_{SF} * \Lambda
+def utilization(counts):
+	return counts * np.array([T_SF[sf] for sf in SF]) * L
+
+# success probability e^p, p = \sum_{cf,sf} -2 . N_{cf,sf} * T_{SF} * \Lambda; returns p
+def success_exponent(counts):
+	return -2 * utilization(counts).sum()
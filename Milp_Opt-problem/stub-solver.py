@@ -0,0 +1,32 @@
+# stand-in for cplex in tests of sweep-opti.py: reads the LP of lora-single-gen.py (or lora-count-gen.py)
+# and prints the greedy assignment (see warm_start.py) in the form of a CPLEX solution log
+# usage: python3 stub-solver.py <LP file> [delay (s)]
+import sys
+import time
+import re
+import count_model
+import warm_start
+from ntw_defs import * # defines some network-related parameters such as available CFs, SF, average tx rate,...
+
+if len(sys.argv) > 1:
+	LP_FN=sys.argv[1]
+else:
+	print("usage: python3 stub-solver.py <LP file> [delay (s)]")
+	exit()
+
+# number of nodes: the cf_<node> rows, or the right hand side of the nodes row of the count formulation
+N = 0
+for line in open(LP_FN, 'r'):
+	m = re.match(r'cf_(\d+):', line)
+	if m:
+		N = max(N, int(m.group(1)))
+	m = re.search(r'[^<>]= (\d+)$', line)
+	if m and N == 0 and 'N_' in line:
+		N = int(m.group(1))
+
+print("Stub solver, {0} nodes".format(N))
+sys.stdout.flush()
+if len(sys.argv) > 2:
+	time.sleep(float(sys.argv[2]))
+cf, sf = warm_start.greedy(N)
+count_model.write_solution(sys.stdout, [(n + 1, CF[cf[n]], SF[sf[n]]) for n in range(N)])
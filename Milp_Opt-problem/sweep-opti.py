@@ -0,0 +1,173 @@
+# runs the optimization problem for many numbers of nodes concurrently (instead of the serial run-opti.sh calls of execute_command.txt)
+# usage: python3 sweep-opti.py [options] N1 N2 ...
+#
+# Every N runs generate -> solve -> parse in its own directory <out>/N<N> (problem.lp, solution.log), at most
+# --jobs at a time. The solver output is written to solution.log and shown as it arrives, prefixed with N;
+# the solver gets --timeout as time limit, and a run still going --grace seconds later is stopped. The results of all runs are printed as one table
+# and written to <out>/results.txt.
+#
+# With --cache <dir> (see solution_cache.py), an N with a cached solution is not generated nor solved (status "cached"),
+# the others start from the better of the greedy assignment and the adapted solution of the nearest cached N, and
+# their solutions are added to the cache when they are proven optimal (cplex: "Integer optimal" in the log; highs: by
+# run-highs.py), so that a solution cut short by the time limit is never taken for the optimum.
+#
+# solvers:
+#   cplex   cplex -c "read problem.lp" "read start.mst" "optimize" "display solution variables -", with the greedy MIP start
+#   highs   run-highs.py (HiGHS in-process, see highs_backend.py)
+#   minmax  run-minmax.py (exact, by counting, see minmax_solver.py); no problem.lp is generated
+#   stub    stub-solver.py, the greedy assignment in the form of a CPLEX log, for tests without a solver
+import os
+import sys
+import time
+import math
+import asyncio
+import argparse
+import solution_io
+import solution_cache
+import warm_start
+from ntw_defs import * # defines some network-related parameters such as available CFs, SF, average tx rate,...
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def script(name):
+	return os.path.join(HERE, name)
+
+# the commands of one run: [(command, output file or None), ...]
+# (with a cache, start.mst is written by run_one())
+def pipeline(N, solver, count, timeout, delay=None, cache=None):
+	gen = script("lora-count-gen.py" if count else "lora-single-gen.py")
+	# run-minmax.py does not read the problem
+	steps = [([sys.executable, gen, str(N), "problem.lp"], None)] if solver != "minmax" else []
+	if solver == "cplex":
+		cmds = ["read problem.lp"]
+		if not count:
+			if cache is None:
+				steps.append(([sys.executable, script("lora-greedy-start.py"), str(N), "start.mst"], None))
+			cmds.append("read start.mst")
+		if timeout is not None:
+			cmds.append("set timelimit {0}".format(timeout))
+		cmds = cmds + ["optimize", "display solution variables -"]
+		steps.append((["cplex", "-c"] + cmds, "solution.log"))
+	elif solver == "highs":
+		steps.append(([sys.executable, script("run-highs.py"), str(N), "count" if count else "node", "solution.log",
+			str(timeout) if timeout is not None else "-"] + ([cache] if cache else []), None))
+	elif solver == "minmax":
+		steps.append(([sys.executable, script("run-minmax.py"), str(N), "solution.log"], None))
+	else:
+		steps.append(([sys.executable, script("stub-solver.py"), "problem.lp"] + ([str(delay)] if delay else []), "solution.log"))
+	return steps
+
+# runs one command in workdir, shows its output line by line and copies it to log
+async def run_step(N, cmd, workdir, log):
+	proc = await asyncio.create_subprocess_exec(*cmd, cwd=workdir, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+	try:
+		out = open(os.path.join(workdir, log), 'w') if log else None
+		try:
+			async for line in proc.stdout:
+				text = line.decode(errors='replace')
+				if out:
+					out.write(text)
+				print("[N={0}] {1}".format(N, text), end='')
+		finally:
+			if out:
+				out.close()
+		return await proc.wait()
+	except asyncio.CancelledError:
+		proc.kill()
+		await proc.wait()
+		raise
+
+# MU, success and utilization of the assignment cf, sf
+def statistics(result, cf, sf):
+	counts = solution_io.count_matrix(cf, sf)
+	u = solution_io.utilization(counts)
+	result['MU'] = u.max()
+	result['success'] = math.exp(solution_io.success_exponent(counts))*100
+	result['utilization'] = u.sum()*100
+
+# True when the CPLEX log reports an optimal solution ("MIP - Integer optimal solution", "Integer optimal, tolerance")
+def proven_optimal(log):
+	with open(log, 'r') as f:
+		return any('Integer optimal' in line for line in f)
+
+# MIP start of CPLEX from the cache: the better of the greedy assignment and the adapted nearest cached solution
+def write_start(N, formulation, cache, workdir):
+	cf, sf = warm_start.greedy(N)
+	near = solution_cache.start(N, formulation, cache)
+	if near is not None and warm_start.utilization(*near) < warm_start.utilization(cf, sf):
+		cf, sf = near
+	with open(os.path.join(workdir, "start.mst"), 'w') as f:
+		warm_start.write_mst(f, cf, sf)
+
+async def run_one(N, args, limit):
+	async with limit:
+		workdir = os.path.join(args.out, "N{0}".format(N))
+		os.makedirs(workdir, exist_ok=True)
+		start = time.time()
+		result = {'N': N, 'status': 'ok', 'MU': math.nan, 'success': math.nan, 'utilization': math.nan}
+		formulation = 'count' if args.count else 'node'
+		cached = solution_cache.get(N, formulation, args.cache) if args.cache else None
+		if cached is not None:
+			statistics(result, cached[0], cached[1])
+			result['status'] = 'cached'
+			result['seconds'] = time.time() - start
+			return result
+		if args.cache and args.solver == "cplex" and not args.count:
+			write_start(N, formulation, args.cache, workdir)
+		async def steps():
+			for cmd, log in pipeline(N, args.solver, args.count, args.timeout, args.delay, args.cache):
+				code = await run_step(N, cmd, workdir, log)
+				if code != 0:
+					return "{0} failed ({1})".format(os.path.basename(cmd[1] if cmd[0] == sys.executable else cmd[0]), code)
+			return 'ok'
+		try:
+			result['status'] = await asyncio.wait_for(steps(), args.timeout + args.grace if args.timeout else None)
+		except asyncio.TimeoutError:
+			result['status'] = 'timeout'
+		if result['status'] == 'ok':
+			try:
+				cf, sf = solution_io.read(os.path.join(workdir, "solution.log"))
+			except ValueError:
+				cf = sf = None
+			if cf is None or (cf < 0).any() or (sf < 0).any() or len(cf) != N:
+				result['status'] = 'no solution'
+			else:
+				statistics(result, cf, sf)
+				# run-highs.py adds its solutions itself
+				if args.cache and args.solver == "cplex" and proven_optimal(os.path.join(workdir, "solution.log")):
+					solution_cache.put(N, cf, sf, result['MU'], formulation, args.cache)
+		result['seconds'] = time.time() - start
+		return result
+
+async def sweep(args):
+	limit = asyncio.Semaphore(args.jobs)
+	return await asyncio.gather(*[run_one(N, args, limit) for N in args.nodes])
+
+def table(results):
+	lines = ["{0:>8} {1:>12} {2:>12} {3:>12} {4:>10}  {5}".format("N", "MU", "success %", "util %", "seconds", "status")]
+	for r in results:
+		lines.append("{0:>8} {1:>12.8f} {2:>12.6f} {3:>12.6f} {4:>10.2f}  {5}".format(r['N'], r['MU'], r['success'], r['utilization'], r['seconds'], r['status']))
+	return "\n".join(lines) + "\n"
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="runs the optimization problem for many numbers of nodes concurrently")
+	parser.add_argument("nodes", type=int, nargs='+', help="numbers of nodes")
+	parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="runs at a time (default: number of CPUs)")
+	parser.add_argument("--timeout", type=float, default=None, help="time limit of a run in seconds (also given to the solver)")
+	parser.add_argument("--grace", type=float, default=30, help="seconds after --timeout before a run is stopped (default: 30)")
+	parser.add_argument("--solver", choices=("cplex", "highs", "minmax", "stub"), default="cplex")
+	parser.add_argument("--count", action="store_true", help="solve the count formulation (see count_model.py)")
+	parser.add_argument("--delay", type=float, default=None, help="seconds the stub solver waits before it answers")
+	parser.add_argument("--out", default="sweep", help="directory of the runs (default: sweep)")
+	parser.add_argument("--cache", default=None, help="directory of the solution cache (see solution_cache.py)")
+	args = parser.parse_args()
+	args.out = os.path.abspath(args.out)
+	if args.cache:
+		args.cache = os.path.abspath(args.cache)
+
+	results = asyncio.run(sweep(args))
+	text = table(results)
+	print()
+	print(text, end='')
+	with open(os.path.join(args.out, "results.txt"), 'w') as f:
+		f.write(text)
@@ -0,0 +1,50 @@
+# greedy assignment of the nodes as a MIP start
+#
+# Like the approximate algorithm of LoRaSim_Approx_alg (experiment 4), every
+# node in turn gets the {sf,cf} with the lowest utilization m_uti and adds its
+# load to it; here the utilization is the one with the node added, so that
+# free slow {sf,cf} are not taken while a fast one is still nearly empty. The
+# result is feasible and close to the optimum, so it is given to the solver
+# as a start: to CPLEX as a MIP start file (.mst, read after the LP with
+# "read <file>.mst"), to highs_backend.solve() as start.
+import numpy as np
+from ntw_defs import * # defines some network-related parameters such as available CFs, SF, average tx rate,...
+
+NCF = len(CF)
+NSF = len(SF)
+
+# cf and sf of every node (indices in CF and SF)
+def greedy(N):
+	load = np.array([T_SF[sf]*L for sf in SF])
+	m_uti = np.zeros((NSF, NCF))
+	cf = np.zeros(N, dtype=int)
+	sf = np.zeros(N, dtype=int)
+	for n in range(N):
+		minX, minY = np.unravel_index(np.argmin(m_uti + load[:, None]), m_uti.shape)
+		sf[n] = minX
+		cf[n] = minY
+		m_uti[minX, minY] = m_uti[minX, minY] + load[minX]
+	return cf, sf
+
+# MU of an assignment: the highest load of any {cf,sf}
+def utilization(cf, sf):
+	load = np.array([T_SF[s]*L for s in SF])
+	return np.bincount(cf*NSF + sf, weights=load[sf], minlength=NCF*NSF).max()
+
+# the assignment as a CPLEX MIP start file, with the values of all variables of lp_writer.py
+def write_mst(f, cf, sf):
+	f.write('<?xml version = "1.0" encoding="UTF-8" standalone="yes"?>\n')
+	f.write('<CPLEXSolutions version="1.2">\n <CPLEXSolution version="1.2">\n')
+	f.write('  <header problemName="lora" solutionName="greedy" solutionIndex="0"/>\n  <variables>\n')
+	f.write('   <variable name="MU" value="{0:.10g}"/>\n'.format(utilization(cf, sf)))
+	for n in range(len(cf)):
+		lines = []
+		for i in range(NCF):
+			lines.append('   <variable name="CF_{0}#{1}" value="{2}"/>\n'.format(n + 1, CF[i], int(cf[n] == i)))
+		for j in range(NSF):
+			lines.append('   <variable name="SF_{0}#{1}" value="{2}"/>\n'.format(n + 1, SF[j], int(sf[n] == j)))
+		for i in range(NCF):
+			for j in range(NSF):
+				lines.append('   <variable name="Z_{0}#{1}#{2}" value="{3}"/>\n'.format(n + 1, CF[i], SF[j], int(cf[n] == i and sf[n] == j)))
+		f.write("".join(lines))
+	f.write('  </variables>\n </CPLEXSolution>\n</CPLEXSolutions>\n')